@@ -1,8 +1,17 @@
 import json
+import os
 import re
+import sys
 import argparse
 from typing import Dict, Any
 
+# the shared pipeline helpers live in scripts/ and import each other as top-level modules
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from profiling import StageProfiler, add_profiling_args, graph_counts, profiler_from_args
+
 # ------------------------------------------------------------------
 # Core parser
 # ------------------------------------------------------------------
@@ -29,23 +38,140 @@ def add_link(graph: Dict[str, Any], source: str, target: str):
     graph["links"].append({"source": source, "target": target})
 
 
-def parse_device_line(line: str):
+# SPICE element letter -> (pin count, device_type) for elements with a value
+# instead of a model name (pin count None: pins run up to the model name)
+SPICE_VALUE_ELEMENTS = {
+    "R": (2, "resistor"),
+    "C": (2, "capacitor"),
+    "L": (2, "inductor"),
+    "V": (2, "vsource"),
+    "I": (2, "isource"),
+    "E": (4, "vcvs"),
+    "G": (4, "vccs"),
+    "F": (2, "cccs"),
+    "H": (2, "ccvs"),
+}
+SPICE_MODEL_ELEMENTS = ("M", "Q", "D", "J", "X")
+
+# Spectre statements that are not instances, e.g. `include "x.scs" section=tt`
+SPECTRE_STATEMENTS = {
+    "include", "ahdl_include", "simulator", "global", "parameters", "save", "ic", "nodeset",
+    "library", "endlibrary", "section", "endsection", "subckt", "ends", "model", "inline",
+    "statistics", "real", "export",
+}
+# Spectre analyses/control statements written as `<name> <keyword> key=value ...`,
+# e.g. `finalTimeOP info what=oppoint where=rawfile`
+SPECTRE_ANALYSES = {
+    "info", "options", "set", "shell", "alter", "altergroup", "check", "checklimit",
+    "dc", "ac", "tran", "noise", "xf", "sp", "pz", "stb", "dcmatch", "sweep", "montecarlo",
+    "pss", "pac", "pnoise", "pxf", "qpss", "hb", "hbac", "hbnoise", "envlp",
+}
+
+SPECTRE_LANG_RE = re.compile(r'^\s*simulator\s+lang\s*=\s*spectre\b', re.I | re.M)
+# `M2 (VOUT1 net14 VDD VDD) pmos4` style instance (not a comment or dot-card)
+PAREN_INSTANCE_RE = re.compile(r'^\s*[^\s*.+/;$]\S*?\s*\(', re.M)
+COMMENT_CHARS_RE = re.compile(r'[$;*]|//')
+
+DIALECTS = ("auto", "spice", "spectre")
+
+
+def strip_inline_comment(line: str) -> str:
+    """
+    Remove a comment from a netlist line. `*` comments out the whole line when
+    it comes first, and the rest of it when it follows whitespace; `$`, `;` and
+    `//` start an inline comment. None of them counts inside a `{...}` or
+    quoted expression, so `W={2*WN}` and `'WN*2'` stay intact.
+    """
+    line = line.strip()
+    if line.startswith("*"):
+        return ""
+    if not COMMENT_CHARS_RE.search(line):
+        return line
+    depth = 0
+    quote = None
+    for i, ch in enumerate(line):
+        if quote is not None:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth = max(0, depth - 1)
+        elif depth == 0 and (ch in "$;" or line.startswith("//", i) or (ch == "*" and line[i - 1].isspace())):
+            return line[:i].strip()
+    return line
+
+
+def is_spice_dialect(netlist_text: str) -> bool:
+    """
+    True if plain SPICE element lines (no parentheses around the nodes) should
+    be parsed: the netlist neither selects `simulator lang=spectre` nor uses
+    parenthesized Spectre instances.
+    """
+    return not (SPECTRE_LANG_RE.search(netlist_text) or PAREN_INSTANCE_RE.search(netlist_text))
+
+
+def is_spectre_statement(tokens) -> bool:
+    """True for Spectre control lines (`include ...`, `<name> info what=...`)."""
+    if tokens[0].lower() in SPECTRE_STATEMENTS:
+        return True
+    return (len(tokens) > 1 and tokens[1].lower() in SPECTRE_ANALYSES
+            and all("=" in t for t in tokens[2:]))
+
+
+def parse_spice_element(line: str):
+    """
+    Parse a plain SPICE element line (no parentheses around the nodes):
+        M0  VOUT1 VIN1 IB1 VSS  nmos4  W={WN0} L={LN0}
+        R1  VOUT1 net14  {RCM1}
+        VIN1 VIN1 0 DC {VCM + VID/2}
+    Returns (dev_name, node_list, dev_type, extra_tokens) or None. For value
+    elements (R, C, V, ...) `extra_tokens` starts with the value; for model
+    elements (M, Q, D, ...) it holds the instance parameters.
+    """
+    line = strip_inline_comment(line)
+    if not line or line[0] in ".+":
+        return None
+    tokens = line.split()
+    if is_spectre_statement(tokens):
+        return None
+    letter = tokens[0][0].upper()
+    if letter in SPICE_VALUE_ELEMENTS:
+        n_pins, dev_type = SPICE_VALUE_ELEMENTS[letter]
+        if len(tokens) < n_pins + 1:
+            return None
+        return tokens[0], tokens[1:n_pins + 1], dev_type, tokens[n_pins + 1:]
+    if letter in SPICE_MODEL_ELEMENTS:
+        positional = []
+        for tok in tokens[1:]:
+            if "=" in tok:
+                break
+            positional.append(tok)
+        if len(positional) < 2:
+            return None
+        return tokens[0], positional[:-1], positional[-1], tokens[1 + len(positional):]
+    return None
+
+
+def parse_device_line(line: str, spice: bool = False):
     """
     Parse a single device line of the form:
         M2 (VOUT1 net14 VDD VDD) pmos4
         R1 (VOUT1 net14) resistor
+    or, with `spice`, a plain SPICE element line (see parse_spice_element).
     Returns (dev_name, node_list, dev_type) or None if not a device.
     """
-    # Remove inline comments after '*', '//', or ';'
-    line = re.split(r'[\*;]', line, maxsplit=1)[0]
-    line = re.split(r'//', line, maxsplit=1)[0].strip()
+    line = strip_inline_comment(line)
     if not line:
         return None
 
     # Match: <name> (<nodes...>) <type> ...
     m = re.match(r'^(\S+)\s*\(([^)]*)\)\s*([^\s]+)?', line)
     if not m:
-        return None
+        parsed = parse_spice_element(line) if spice else None
+        return parsed[:3] if parsed else None
 
     dev_name = m.group(1)
     nodes_str = m.group(2).strip()
@@ -127,54 +253,77 @@ def handle_generic_device(graph: Dict[str, Any],
         add_link(graph, dev_id, net_id)
 
 
-def netlist_to_graph_json(netlist_text: str) -> Dict[str, Any]:
+def is_mos_device(dev_name: str, dev_type: str) -> bool:
+    return dev_type.lower() in MOS_LIKE_MODELS or dev_name[0].upper() == "M"
+
+
+def iter_netlist_devices(netlist_text: str, dialect: str = "auto"):
     """
-    Main entry: parse multiline netlist text into a JSON-serializable graph
-    with nodes and links.
+    Yield (dev_name, node_list, dev_type) for every device line of a netlist.
+    Plain SPICE element lines are only parsed for SPICE input: `dialect`
+    "spice", or "auto" when `is_spice_dialect` holds.
     """
-    graph = {
-        "directed": False,
-        "multigraph": False,
-        "graph": {},
-        "nodes": [],
-        "links": [],
-    }
-
+    if dialect not in DIALECTS:
+        raise ValueError(f"Unknown netlist dialect {dialect!r}; expected one of {DIALECTS}")
+    spice = dialect == "spice" or (dialect == "auto" and is_spice_dialect(netlist_text))
     for raw_line in netlist_text.splitlines():
         line = raw_line.strip()
         if not line or line.startswith('*'):
             continue
 
-        parsed = parse_device_line(line)
+        parsed = parse_device_line(line, spice)
         if parsed is None:
             continue
+        yield parsed
 
-        dev_name, node_list, dev_type = parsed
-        dev_type_lower = dev_type.lower()
 
-        if dev_type_lower in MOS_LIKE_MODELS or dev_name[0].upper() == "M":
-            # Treat as MOS-like device (3-terminal abstraction)
-            handle_mos_device(graph, dev_name, node_list, dev_type)
-        else:
-            # resistor, source, etc.
-            handle_generic_device(graph, dev_name, node_list, dev_type)
+def add_device(graph: Dict[str, Any], dev_name: str, node_list, dev_type: str):
+    """Add nodes/edges of one parsed device line to the graph."""
+    if is_mos_device(dev_name, dev_type):
+        # Treat as MOS-like device (3-terminal abstraction)
+        handle_mos_device(graph, dev_name, node_list, dev_type)
+    else:
+        # resistor, source, etc.
+        handle_generic_device(graph, dev_name, node_list, dev_type)
+
+
+def netlist_to_graph_json(netlist_text: str, dialect: str = "auto") -> Dict[str, Any]:
+    """
+    Main entry: parse multiline netlist text into a JSON-serializable graph
+    with nodes and links. `dialect` is "auto", "spice" or "spectre" (see
+    iter_netlist_devices).
+    """
+    graph = {
+        "directed": False,
+        "multigraph": False,
+        "graph": {},
+        "nodes": [],
+        "links": [],
+    }
+
+    for dev_name, node_list, dev_type in iter_netlist_devices(netlist_text, dialect):
+        add_device(graph, dev_name, node_list, dev_type)
 
     # Internal index is not part of output JSON
     graph.pop("nodes_index", None)
     return graph
 
 
-def write_graph_json_from_netlist(netlist_text: str, outfile: str):
-    graph = netlist_to_graph_json(netlist_text)
-    with open(outfile, "w") as f:
-        json.dump(graph, f, indent=2)
+def write_graph_json_from_netlist(netlist_text: str, outfile: str, profiler=None, dialect: str = "auto"):
+    profiler = profiler or StageProfiler()
+    with profiler.stage("parse_netlist") as rec:
+        graph = netlist_to_graph_json(netlist_text, dialect)
+        rec.update(graph_counts(graph))
+    with profiler.stage("write_str_graph"):
+        with open(outfile, "w") as f:
+            json.dump(graph, f, indent=2)
     print(f"Wrote graph JSON to {outfile}")
 
 
 # ------------------------------------------------------------------
 # Example usage
 # ------------------------------------------------------------------
-if __name__ == "__main__":
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Convert netlist to circuit graph JSON"
     )
@@ -190,10 +339,24 @@ if __name__ == "__main__":
         required=True,
         help="Path to the output JSONL file"
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--dialect",
+        choices=DIALECTS,
+        default="auto",
+        help="Netlist dialect; 'auto' parses plain SPICE element lines only when the "
+             "file has no 'simulator lang=spectre' and no parenthesized instances"
+    )
+    add_profiling_args(parser)
+    args = parser.parse_args(argv)
+    profiler = profiler_from_args(args, circuit=os.path.dirname(args.netlist_path))
 
     # Read netlist from file
-    with open(args.netlist_path, "r") as f:
-        netlist = f.read()
+    with profiler.stage("read_netlist"):
+        with open(args.netlist_path, "r") as f:
+            netlist = f.read()
 
-    write_graph_json_from_netlist(netlist, args.output_jsonl)
+    write_graph_json_from_netlist(netlist, args.output_jsonl, profiler, args.dialect)
+
+
+if __name__ == "__main__":
+    main()
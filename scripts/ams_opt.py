@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Single entry point for all pipeline stages.
+
+Each subcommand forwards its arguments to the matching stage script, which
+is imported only when that subcommand runs, so heavy dependencies (NumPy)
+are loaded only by the stages that need them.
+
+Usage:
+  python scripts/ams_opt.py str-graph --netlist-path netlists/diff_amps/75/75.cir --output-jsonl netlists/diff_amps/75/str_graph.json
+  python scripts/ams_opt.py transform --in netlists/diff_amps/75/
+  python scripts/ams_opt.py combine --str_graph netlists/diff_amps/75/ --fun_graph netlists/diff_amps/75/fun_updated.json --out netlists/diff_amps/75/
+  python scripts/ams_opt.py gnn --in netlists/diff_amps/75/
+
+  # run every stage for many circuits in one process
+  python scripts/ams_opt.py pipeline netlists/diff_amps/*/
+"""
+import argparse
+import importlib
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# subcommand -> (module, help). Modules are imported lazily and must expose main(argv).
+STAGES: Dict[str, Tuple[str, str]] = {
+    "str-graph": ("get_netlist_to_SG", "Parse a SPICE netlist into str_graph.json"),
+    "transform": ("transform_fun_graph", "Expand fun_graph.json into fun_updated.json"),
+    "combine": ("combine_graphs", "Merge structural and functional graphs into comb_graph.json"),
+    "gnn": ("comb_graph_to_gnn", "Build GNN feature/adjacency arrays from comb_graph.json"),
+    "fun-prompt": ("generate_fun_graph_prompt", "Write the functional-graph LLM prompt"),
+    "prune-prompt": ("generate_prune_prompt", "Write the prune LLM prompt"),
+    "ingest": ("ingest_corpus", "Parse a multi-circuit corpus file/archive into one packed dataset"),
+    "adapters": ("graph_adapters", "Report the sparse/networkx views of comb_graph_gnn.npz"),
+    "watch": ("watch_daemon", "Watch circuit dirs and rebuild only the affected stages"),
+    "sample": ("neighbor_sampler", "Sample k-hop training subgraphs from a combined graph"),
+    "parse-response": ("parse_llm_response", "Turn raw LLM responses into fun_graph.json / <id>_prune.json"),
+    "canonicalize": ("canonicalize_netlist", "Reduce a netlist to prompt-relevant device lines / restore net names"),
+    "similar": ("similarity_index", "Build/query a structural similarity index over circuits"),
+    "sweep": ("param_sweep", "Stack sized variants of a .param sweep over one shared topology"),
+    "incremental": ("incremental_update", "Patch cached graphs/arrays after a netlist edit"),
+    "query": ("graph_query", "Query nets/devices/k-hop neighborhoods of str_graph.json"),
+    "validate": ("validate_graphs", "Check graph JSON files across a corpus for schema drift"),
+    "profile-summary": ("profiling", "Summarize --profile-jsonl records"),
+}
+
+
+def load_stage(module: str):
+    # get_netlist_to_SG.py lives at the repository root, the rest in scripts/
+    for d in (SCRIPTS_DIR, REPO_ROOT):
+        if d not in sys.path:
+            sys.path.insert(0, d)
+    return importlib.import_module(module)
+
+
+def run_pipeline(circuit_dirs: List[str], fun_graph_name: str, profiler) -> int:
+    """Run str-graph -> transform -> combine -> gnn for each circuit dir in-process.
+
+    Returns the number of circuits that failed.
+    """
+    graph_io = load_stage("graph_io")
+    graph_counts = load_stage("profiling").graph_counts
+    sg = load_stage("get_netlist_to_SG")
+    tfg = load_stage("transform_fun_graph")
+    cg = load_stage("combine_graphs")
+    gnn = load_stage("comb_graph_to_gnn")
+
+    failures = 0
+    for d in circuit_dirs:
+        profiler.circuit = d
+        try:
+            netlist_path = graph_io.find_netlist_in_dir(d)
+            if not netlist_path:
+                raise FileNotFoundError(f"No netlist (.cir/.sp/.net) found in {d}")
+            with profiler.stage("read_netlist"):
+                with open(netlist_path, "r") as f:
+                    netlist = f.read()
+            str_path = os.path.join(d, "str_graph.json")
+            sg.write_graph_json_from_netlist(netlist, str_path, profiler)
+
+            fun_path = os.path.join(d, fun_graph_name)
+            if not os.path.exists(fun_path):
+                print(f"Skipping functional stages for {d}: {fun_graph_name} not found")
+                continue
+            with profiler.stage("load_fun_graph"):
+                fun_graph = graph_io.load_json(fun_path)
+            with profiler.stage("transform_fun_graph") as rec:
+                fun_updated = tfg.transform_fun_graph(fun_graph)
+                rec.update(graph_counts(fun_updated))
+            graph_io.write_json(fun_updated, os.path.join(d, "fun_updated.json"))
+
+            with profiler.stage("load_graphs"):
+                str_graph = graph_io.load_json(str_path)
+            with profiler.stage("combine_graphs") as rec:
+                combined = cg.build_combined_graph(str_graph, fun_updated)
+                rec.update(graph_counts(combined))
+            with profiler.stage("write_comb_graph"):
+                graph_io.write_json(combined, os.path.join(d, "comb_graph.json"))
+
+            gnn.write_gnn_outputs(combined, d, profiler)
+        except Exception as e:  # keep going so one bad circuit does not stop a corpus run
+            failures += 1
+            print(f"FAILED {d}: {e}", file=sys.stderr)
+    return failures
+
+
+def cmd_pipeline(argv: List[str]) -> int:
+    profiling = load_stage("profiling")
+    p = argparse.ArgumentParser(prog="ams_opt.py pipeline",
+                                description="Run all stages for many circuit directories in one process")
+    p.add_argument("dirs", nargs="*", help="Circuit directories (each holding a netlist and fun_graph.json)")
+    p.add_argument("--from-file", dest="from_file", help="Read additional circuit directories from this file, one per line")
+    p.add_argument("--fun-graph-name", default="fun_graph.json", help="Functional graph filename inside each directory")
+    profiling.add_profiling_args(p)
+    args = p.parse_args(argv)
+
+    dirs = list(args.dirs)
+    if args.from_file:
+        with open(args.from_file, "r") as f:
+            dirs.extend(line.strip() for line in f if line.strip())
+    if not dirs:
+        p.error("no circuit directories given")
+
+    profiler = profiling.profiler_from_args(args)
+    failures = run_pipeline(dirs, args.fun_graph_name, profiler)
+    print(f"Processed {len(dirs) - failures}/{len(dirs)} circuits")
+    return 1 if failures else 0
+
+
+def print_usage() -> None:
+    print("usage: ams_opt.py <command> [args...]\n\ncommands:")
+    print(f"  {'pipeline':<16} Run all stages for many circuit directories in one process")
+    for name, (_, help_text) in STAGES.items():
+        print(f"  {name:<16} {help_text}")
+    print("\nRun 'ams_opt.py <command> --help' for command options.")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0
+    cmd, rest = argv[0], argv[1:]
+    if cmd == "pipeline":
+        return cmd_pipeline(rest)
+    if cmd not in STAGES:
+        print(f"ams_opt.py: unknown command '{cmd}'", file=sys.stderr)
+        print_usage()
+        return 2
+    module, _ = STAGES[cmd]
+    rc = load_stage(module).main(rest)
+    return rc or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
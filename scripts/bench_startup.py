@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Measure interpreter + import startup cost of the pipeline entry points.
+
+Each case is run as a fresh `python` subprocess `--repeat` times and the
+median wall time is reported, so batch overhead per invocation is visible:
+- `python` : bare interpreter baseline
+- `import <module>` : import cost of each stage module
+- `ams_opt.py --help` : dispatcher startup (no stage imported)
+- `numpy` : NumPy import alone, for reference
+
+Usage:
+  python scripts/bench_startup.py --repeat 20
+  python scripts/bench_startup.py --importtime comb_graph_to_gnn   # per-module breakdown via -X importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+STAGE_MODULES = [
+    "get_netlist_to_SG",
+    "transform_fun_graph",
+    "combine_graphs",
+    "comb_graph_to_gnn",
+    "generate_fun_graph_prompt",
+    "generate_prune_prompt",
+]
+
+
+def import_cmd(module: str) -> List[str]:
+    code = f"import sys; sys.path[:0] = [{SCRIPTS_DIR!r}, {REPO_ROOT!r}]; import {module}"
+    return [sys.executable, "-c", code]
+
+
+def time_cmd(cmd: List[str], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - t0)
+    return {"median_ms": round(statistics.median(samples) * 1000.0, 2),
+            "min_ms": round(min(samples) * 1000.0, 2)}
+
+
+def run_benchmark(repeat: int) -> List[Dict[str, object]]:
+    cases = [("python", [sys.executable, "-c", "pass"])]
+    cases += [(f"import {m}", import_cmd(m)) for m in STAGE_MODULES]
+    cases.append(("ams_opt.py --help", [sys.executable, os.path.join(SCRIPTS_DIR, "ams_opt.py"), "--help"]))
+    cases.append(("numpy", [sys.executable, "-c", "import numpy"]))
+
+    results = []
+    for name, cmd in cases:
+        try:
+            r = time_cmd(cmd, repeat)
+        except subprocess.CalledProcessError:
+            r = {"error": "failed"}
+        results.append({"case": name, **r})
+    return results
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark startup/import time of pipeline entry points")
+    p.add_argument("--repeat", type=int, default=10, help="Runs per case (default: 10)")
+    p.add_argument("--importtime", metavar="MODULE", help="Print `-X importtime` output for one module instead")
+    args = p.parse_args(argv)
+
+    if args.importtime:
+        cmd = import_cmd(args.importtime)
+        subprocess.run([cmd[0], "-X", "importtime"] + cmd[1:], check=True)
+        return
+
+    for r in run_benchmark(args.repeat):
+        print(json.dumps(r))
+
+
+if __name__ == "__main__":
+    main()
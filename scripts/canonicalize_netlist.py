@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Reduce a netlist to the lines that matter for the LLM prompts.
+
+Canonical form:
+- comments, blank lines and dot-cards (`.param`, `.model`, `.option`, `.temp`,
+  analyses, `.end`, ...) are dropped; `.subckt`/`.ends` are kept
+- `+` and trailing-`\\` continuation lines are joined first, so multi-line
+  `PWL(...)` stimulus is dropped together with its source
+- every plain SPICE device becomes one line `<name> <nodes...> [<model>]`;
+  independent/controlled sources keep only name and nodes, and instance
+  parameters and R/C/L values are dropped unless `keep_values` is set
+- Spectre-style instances become `<name> (<nodes...>) <model>`: the model is
+  all that says what they are (`I0 (x y z w) amp` is a subckt instance, not
+  a current source), and the parentheses keep them parsed that way
+- optionally, auto-generated net names (`net014`, hierarchical `I0/net3`) are
+  renamed to short names (`n1`, `n2`, ...); named nets such as VIN1/VOUT1 and
+  rails keep their names since the LLM reads meaning into them, as does any
+  net in `keep_nets`. The reverse map (short -> original) restores names in
+  LLM responses before `transform_fun_graph.py` runs
+
+Token counts use `tiktoken` when installed, otherwise a ~4 characters per
+token estimate.
+
+Usage:
+  python scripts/canonicalize_netlist.py --netlist netlists/diff_amps/84/84_gpt.sp
+  python scripts/canonicalize_netlist.py --netlist netlists/diff_amps/84/84_gpt.sp --rename-nets --map-out net_map.json
+  python scripts/canonicalize_netlist.py --restore fun_graph.json --map net_map.json --out fun_graph.json
+
+The prompt scripts use this through their `--compact` / `--rename-nets` options.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from graph_io import load_netlist_parser
+
+sg = load_netlist_parser()
+
+RAIL_NETS = ("0", "VDD", "VSS", "GND", "VCC", "VEE", "AVDD", "AVSS", "DVDD", "DVSS")
+SOURCE_ELEMENTS = ("V", "I", "E", "G", "F", "H")
+KEPT_CARDS = (".subckt", ".ends")
+
+# net names worth shortening: netNNN as exported by schematic tools, hierarchical paths
+AUTO_NET_RE = re.compile(r"(?i)^net_?\d+$|[/.:]")
+
+# `M2 (VOUT1 net14 VDD VDD) pmos4` style lines
+PAREN_DEVICE_RE = re.compile(r"^\S+\s*\(")
+
+NET_MAP_FILENAME = "net_map.json"
+
+
+def logical_lines(netlist_text: str) -> Iterator[str]:
+    """Yield netlist lines with continuations joined and comments removed."""
+    current: Optional[str] = None
+    open_backslash = False
+    for raw in netlist_text.splitlines():
+        # per physical line, so a comment cannot swallow the continuation that follows
+        line = sg.strip_inline_comment(raw)
+        if not line:
+            continue
+        cont = open_backslash or line.startswith("+")
+        open_backslash = line.endswith("\\")
+        line = line.rstrip("\\").strip()
+        if cont:
+            if current is not None:
+                current += " " + line.lstrip("+").strip()
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def parse_line(line: str, spice: bool = True) -> Optional[Tuple[str, List[str], str, List[str]]]:
+    """(name, nodes, dev_type, extras) for a device line; plain SPICE lines only with `spice`."""
+    if not PAREN_DEVICE_RE.match(line):
+        return sg.parse_spice_element(line) if spice else None
+    parsed = sg.parse_device_line(line)
+    if parsed is None:
+        return None
+    name, nodes, dev_type = parsed
+    return name, nodes, dev_type, []
+
+
+def canonical_names(nets: Iterable[str], keep: Iterable[str] = ()) -> Dict[str, str]:
+    """original -> short name for every auto-generated net name that is not a rail or kept."""
+    nets = list(dict.fromkeys(nets))
+    keep_upper = {k.upper() for k in RAIL_NETS} | {k.upper() for k in keep}
+    taken = {n.upper() for n in nets}
+    mapping: Dict[str, str] = {}
+    i = 0
+    for net in nets:
+        if net.upper() in keep_upper or not AUTO_NET_RE.search(net):
+            continue
+        while True:
+            i += 1
+            short = f"n{i}"
+            if short.upper() not in taken:
+                break
+        mapping[net] = short
+    return mapping
+
+
+def canonicalize(netlist_text: str, rename_nets: bool = False, keep_values: bool = False,
+                 keep_nets: Iterable[str] = ()) -> Tuple[str, Dict[str, str]]:
+    """Canonical netlist text and the reverse net map (short -> original; empty without renaming)."""
+    entries: List[Tuple[str, Any]] = []
+    # same device lines as the structural parser (see get_netlist_to_SG.iter_netlist_devices)
+    spice = sg.is_spice_dialect(netlist_text)
+    for line in logical_lines(netlist_text):
+        if line.startswith("."):
+            card = line.split()[0].lower()
+            if card in KEPT_CARDS:
+                entries.append(("card", line.split()))
+            elif keep_values and card == ".param":
+                entries.append(("param", line))
+            continue
+        parsed = parse_line(line, spice)
+        if parsed is not None:
+            entries.append(("instance" if PAREN_DEVICE_RE.match(line) else "device", parsed))
+
+    mapping: Dict[str, str] = {}
+    if rename_nets:
+        nets = []
+        for kind, e in entries:
+            if kind in ("device", "instance"):
+                nets.extend(e[1])
+            elif kind == "card" and e[0].lower() == ".subckt":
+                nets.extend(e[2:])
+        mapping = canonical_names(nets, keep_nets)
+
+    out = []
+    for kind, e in entries:
+        if kind == "param":
+            out.append(e)
+        elif kind == "card":
+            head = e[:2] if e[0].lower() == ".subckt" else e
+            out.append(" ".join(head + [mapping.get(t, t) for t in e[len(head):]]))
+        elif kind == "instance":
+            name, nodes, dev_type, _ = e
+            out.append(f"{name} ({' '.join(mapping.get(n, n) for n in nodes)}) {dev_type}".rstrip())
+        else:
+            name, nodes, dev_type, extras = e
+            letter = name[0].upper()
+            tokens = [name] + [mapping.get(n, n) for n in nodes]
+            if letter in sg.SPICE_VALUE_ELEMENTS:
+                if keep_values and letter not in SOURCE_ELEMENTS and extras:
+                    tokens += extras
+            else:
+                if dev_type:
+                    tokens.append(dev_type)
+                if keep_values:
+                    tokens += extras
+            out.append(" ".join(tokens))
+    return "\n".join(out), {short: orig for orig, short in mapping.items()}
+
+
+def restore_text(text: str, reverse_map: Dict[str, str]) -> str:
+    """Replace short net names (whole words only) by their original names."""
+    if not reverse_map:
+        return text
+    pattern = re.compile(r"(?<![\w])(" + "|".join(map(re.escape, sorted(reverse_map, key=len, reverse=True))) + r")(?![\w])")
+    return pattern.sub(lambda m: reverse_map[m.group(1)], text)
+
+
+def restore_json(obj: Any, reverse_map: Dict[str, str]) -> Any:
+    """Apply `restore_text` to every string (keys included) of a parsed JSON object."""
+    if isinstance(obj, str):
+        return restore_text(obj, reverse_map)
+    if isinstance(obj, list):
+        return [restore_json(v, reverse_map) for v in obj]
+    if isinstance(obj, dict):
+        return {restore_text(k, reverse_map): restore_json(v, reverse_map) for k, v in obj.items()}
+    return obj
+
+
+def estimate_tokens(text: str) -> int:
+    try:
+        import tiktoken
+    except ImportError:
+        return (len(text) + 3) // 4
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
+
+
+def report_savings(label: str, original: str, compact: str, stream=None) -> None:
+    before, after = estimate_tokens(original), estimate_tokens(compact)
+    saved = 100.0 * (before - after) / before if before else 0.0
+    print(f"{label}: {before} -> {after} tokens ({saved:.1f}% saved)", file=stream or sys.stdout)
+
+
+def compact_netlist(netlist_path: str, netlist_text: str, rename_nets: bool = False) -> str:
+    """Canonicalize a netlist for a prompt; with renaming, write the reverse map next to the netlist."""
+    text, reverse_map = canonicalize(netlist_text, rename_nets=rename_nets)
+    if rename_nets:
+        write_net_map(reverse_map, os.path.join(os.path.dirname(netlist_path), NET_MAP_FILENAME))
+    return text
+
+
+def write_net_map(reverse_map: Dict[str, str], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(reverse_map, f, indent=2)
+    print(f"Wrote net map to {path}", file=sys.stderr)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Canonicalize a netlist for LLM prompts, or restore net names in a response")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--netlist", help="Netlist file to canonicalize")
+    group.add_argument("--restore", help="LLM response (JSON or text) whose short net names should be restored")
+    p.add_argument("--rename-nets", action="store_true", help="Rename auto-generated nets (net014, I0/net3) to n1, n2, ...")
+    p.add_argument("--keep-net", action="append", default=[], help="Net name to keep when renaming (repeatable)")
+    p.add_argument("--keep-values", action="store_true", help="Keep .param cards, device values and instance parameters")
+    p.add_argument("--map", help="Reverse net map JSON (for --restore)")
+    p.add_argument("--map-out", help="Write the reverse net map here (default with --rename-nets: <netlist dir>/net_map.json)")
+    p.add_argument("--out", help="Output file (default: stdout)")
+    args = p.parse_args(argv)
+
+    if args.restore:
+        if not args.map:
+            p.error("--restore needs --map")
+        with open(args.map, "r") as f:
+            reverse_map = json.load(f)
+        with open(args.restore, "r") as f:
+            text = f.read()
+        try:
+            out_text = json.dumps(restore_json(json.loads(text), reverse_map), indent=2)
+        except ValueError:
+            out_text = restore_text(text, reverse_map)
+    else:
+        with open(args.netlist, "r") as f:
+            original = f.read()
+        out_text, reverse_map = canonicalize(original, args.rename_nets, args.keep_values, args.keep_net)
+        if args.rename_nets:
+            write_net_map(reverse_map, args.map_out or os.path.join(os.path.dirname(args.netlist), NET_MAP_FILENAME))
+        report_savings(os.path.basename(args.netlist), original, out_text, sys.stderr)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out_text + "\n")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(out_text)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,27 +4,27 @@ Convert a combined graph JSON (`comb_graph.json`) into GNN-ready arrays:
 - `nodes`: list of node ids
 - `features`: NxD feature matrix (D described in output metadata)
 - `adjacency`: NxN adjacency matrix (0/1)
+- `edge_index`, `indptr`: the same edges in CSR order ([2, E] row/column pairs
+  sorted by row, and N+1 row offsets); int32 when it fits, so that
+  `graph_adapters.py` can hand them to scipy.sparse without a copy
 
 Feature layout (flexible):
 - first 6 dims: one-hot node type [performance, sub-structure, parameter, net, device, terminal]
 - next 4 dims: sub-category (meanings depend on node type)
 - last M dims: meaning encoding — at least 4 for performance meanings, extended if there are more sub-structure types
 
-The script writes a `.npz` file with arrays `nodes`, `features`, `adjacency` and a `.json` metadata file explaining mappings.
+The script writes a `.npz` file with arrays `nodes`, `features`, `adjacency`, `edge_index`, `indptr` and a `.json` metadata file explaining mappings.
 
 Usage:
   python scripts/comb_graph_to_gnn.py --in path/to/comb_graph.json --out-dir path/to/output_dir
 If `--in` is a directory, looks for `comb_graph.json` inside it.
 """
 import argparse
-import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
-try:
-    import numpy as np
-except Exception:
-    np = None
+from graph_io import load_json, write_json
+from profiling import StageProfiler, add_profiling_args, graph_counts, profiler_from_args
 
 
 NODE_TYPES = ["performance", "sub-structure", "parameter", "net", "device", "terminal"]
@@ -37,14 +37,13 @@ NODE_TYPES = ["performance", "sub-structure", "parameter", "net", "device", "ter
 SUBCAT_SLOTS = 4
 
 
-def load_json(path: str) -> Dict[str, Any]:
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-def write_json(obj: Dict[str, Any], path: str) -> None:
-    with open(path, "w") as f:
-        json.dump(obj, f, indent=2)
+def load_numpy():
+    """Import NumPy on first use; returns None when it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
 
 
 def node_type_index(t: str) -> int:
@@ -165,38 +164,43 @@ def build_adjacency(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]]):
     return adj
 
 
-def main():
-    p = argparse.ArgumentParser(description="Convert comb_graph.json into GNN-ready arrays")
-    p.add_argument("--in", dest="in_path", required=True, help="Path to comb_graph.json or directory containing it")
-    p.add_argument("--out-dir", dest="out_dir", required=False, help="Directory to write outputs (defaults to input dir)")
-    args = p.parse_args()
+def csr_arrays(adjacency, np):
+    """Row-major `edge_index` ([2, E]) and `indptr` ([N+1]) of a dense adjacency matrix."""
+    rows, cols = np.nonzero(adjacency)
+    n = adjacency.shape[0]
+    dtype = np.int32 if max(n, len(rows)) < 2 ** 31 else np.int64
+    indptr = np.zeros(n + 1, dtype=dtype)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return np.stack([rows, cols]).astype(dtype), indptr
 
-    in_path = args.in_path
-    if os.path.isdir(in_path):
-        in_path = os.path.join(in_path, "comb_graph.json")
-    if not os.path.exists(in_path):
-        raise FileNotFoundError(f"comb_graph.json not found at {in_path}")
 
-    out_dir = args.out_dir or os.path.dirname(in_path)
-    os.makedirs(out_dir, exist_ok=True)
+def write_gnn_outputs(data: Dict[str, Any], out_dir: str, profiler: Optional[StageProfiler] = None) -> Dict[str, Any]:
+    """Build features/adjacency for a combined graph dict and write them plus metadata to `out_dir`.
 
-    data = load_json(in_path)
+    Returns the metadata dict.
+    """
+    profiler = profiler or StageProfiler()
     nodes = data.get("nodes", [])
     links = data.get("links", [])
 
-    perf_meanings = detect_performance_meanings(nodes)
-    substruct_types = detect_substructure_types(nodes)
-
-    features_list, D, meaning_dim = build_feature_matrix(nodes, perf_meanings, substruct_types)
-    adj = build_adjacency(nodes, links)
+    with profiler.stage("build_features", **graph_counts(data)):
+        perf_meanings = detect_performance_meanings(nodes)
+        substruct_types = detect_substructure_types(nodes)
+        features_list, D, meaning_dim = build_feature_matrix(nodes, perf_meanings, substruct_types)
+    with profiler.stage("build_adjacency", **graph_counts(data)):
+        adj = build_adjacency(nodes, links)
 
     # Convert to numpy if available
     nodes_ids = [n["id"] for n in nodes]
+    np = load_numpy()
     if np is not None:
         features = np.asarray(features_list, dtype=np.float32)
         adjacency = np.asarray(adj, dtype=np.uint8)
         npz_path = os.path.join(out_dir, "comb_graph_gnn.npz")
-        np.savez_compressed(npz_path, nodes=np.array(nodes_ids, dtype=object), features=features, adjacency=adjacency)
+        edge_index, indptr = csr_arrays(adjacency, np)
+        with profiler.stage("write_npz", **graph_counts(data)):
+            np.savez_compressed(npz_path, nodes=np.array(nodes_ids, dtype=object), features=features,
+                                adjacency=adjacency, edge_index=edge_index, indptr=indptr)
         print(f"Wrote NPZ to {npz_path}")
     else:
         # fallback to JSON
@@ -217,6 +221,29 @@ def main():
     meta_path = os.path.join(out_dir, "comb_graph_gnn_meta.json")
     write_json(meta, meta_path)
     print(f"Wrote metadata to {meta_path}")
+    return meta
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Convert comb_graph.json into GNN-ready arrays")
+    p.add_argument("--in", dest="in_path", required=True, help="Path to comb_graph.json or directory containing it")
+    p.add_argument("--out-dir", dest="out_dir", required=False, help="Directory to write outputs (defaults to input dir)")
+    add_profiling_args(p)
+    args = p.parse_args(argv)
+
+    in_path = args.in_path
+    if os.path.isdir(in_path):
+        in_path = os.path.join(in_path, "comb_graph.json")
+    if not os.path.exists(in_path):
+        raise FileNotFoundError(f"comb_graph.json not found at {in_path}")
+
+    out_dir = args.out_dir or os.path.dirname(in_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    profiler = profiler_from_args(args, circuit=os.path.dirname(in_path))
+    with profiler.stage("load_comb_graph"):
+        data = load_json(in_path)
+    write_gnn_outputs(data, out_dir, profiler)
 
 
 if __name__ == "__main__":
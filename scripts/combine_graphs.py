@@ -9,22 +9,14 @@ Usage:
       --fun_graph path/to/fun_graph.json --out path/to/comb_graph.json
 """
 import argparse
-import json
 import os
 from typing import Dict, List, Any, Tuple
 
-
-MOS_KEYWORDS = ("mos", "nmos", "pmos")
-
-
-def load_json(path: str) -> Dict[str, Any]:
-    with open(path, "r") as f:
-        return json.load(f)
+from graph_io import load_json, resolve_input, resolve_output, write_json
+from profiling import add_profiling_args, graph_counts, profiler_from_args
 
 
-def write_json(obj: Dict[str, Any], path: str) -> None:
-    with open(path, "w") as f:
-        json.dump(obj, f, indent=2)
+MOS_KEYWORDS = ("mos", "nmos", "pmos")
 
 
 def node_list_to_dict(nodes: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
@@ -125,35 +117,31 @@ def build_combined_graph(str_graph: Dict[str, Any], fun_graph: Dict[str, Any]) -
     return out
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Combine structure and functional graphs into one graph")
     p.add_argument("--str_graph", required=True, help="Path to structure graph JSON (str_graph.json)")
     p.add_argument("--fun_graph", required=True, help="Path to functional graph JSON (fun_graph.json)")
     p.add_argument("--out", required=True, help="Path to write combined graph JSON")
-    args = p.parse_args()
+    add_profiling_args(p)
+    args = p.parse_args(argv)
 
     # If the provided paths are directories, look for the expected filenames inside them.
-    def resolve_input(path: str, default_filename: str) -> str:
-        if os.path.isdir(path):
-            candidate = os.path.join(path, default_filename)
-            if not os.path.exists(candidate):
-                raise FileNotFoundError(f"Expected file '{default_filename}' inside directory {path}")
-            return candidate
-        return path
-
     str_path = resolve_input(args.str_graph, "str_graph.json")
     fun_path = resolve_input(args.fun_graph, "fun_graph.json")
 
     # Resolve output: if directory provided, create comb_graph.json inside it
-    out_path = args.out
-    if os.path.isdir(out_path):
-        out_path = os.path.join(out_path, "comb_graph.json")
-
-    str_graph = load_json(str_path)
-    fun_graph = load_json(fun_path)
-
-    combined = build_combined_graph(str_graph, fun_graph)
-    write_json(combined, out_path)
+    out_path = resolve_output(args.out, "comb_graph.json")
+
+    profiler = profiler_from_args(args, circuit=os.path.dirname(str_path))
+    with profiler.stage("load_graphs"):
+        str_graph = load_json(str_path)
+        fun_graph = load_json(fun_path)
+
+    with profiler.stage("combine_graphs") as rec:
+        combined = build_combined_graph(str_graph, fun_graph)
+        rec.update(graph_counts(combined))
+    with profiler.stage("write_comb_graph"):
+        write_json(combined, out_path)
     print(f"Wrote combined graph to {out_path}")
 
 
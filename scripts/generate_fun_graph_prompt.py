@@ -6,22 +6,20 @@ and writing the resulting prompt to the circuit directory.
 Usage examples:
   python scripts/generate_fun_graph_prompt.py --circuit netlists/diff_amps/75/
   python scripts/generate_fun_graph_prompt.py --netlist netlists/diff_amps/75/75.cir --out netlists/diff_amps/75/graph_query_prompt.txt
+  python scripts/generate_fun_graph_prompt.py --circuit netlists/diff_amps/84/ --examples-index circuits.npz --num-examples 2
+  python scripts/generate_fun_graph_prompt.py --netlist netlists/diff_amps/84/84_gpt.sp --compact --rename-nets
 
 If no --out is given the script will write `graph_query_prompt.txt` into the circuit directory.
+
+With --examples-index (an index built by similarity_index.py) the fun_graph.json
+of the most similar already-processed circuits are included as few-shot examples.
 """
 import argparse
 import os
-import glob
-from typing import Optional
-
+import sys
+from typing import List, Optional, Tuple
 
-def find_netlist_in_dir(d: str) -> Optional[str]:
-    patterns = ["*.cir", "*.sp", "*.net"]
-    for p in patterns:
-        matches = glob.glob(os.path.join(d, p))
-        if matches:
-            return matches[0]
-    return None
+from graph_io import find_netlist_in_dir
 
 
 PROMPT_TEMPLATE = """
@@ -63,7 +61,7 @@ For example:
     {{"source": "Gain", "target": "CMRR", "relation": "ambiguous"}}, etc]
 
 
-Netlist:
+{examples}Netlist:
 ```
 {netlist}
 ```
@@ -71,17 +69,64 @@ Netlist:
 """
 
 
-def build_prompt(netlist_text: str) -> str:
-    return PROMPT_TEMPLATE.format(netlist=netlist_text)
+EXAMPLE_TEMPLATE = """Example {i} netlist:
+```
+{netlist}
+```
+Example {i} output:
+```json
+{fun_graph}
+```
+
+"""
+
+
+def build_examples(examples: List[Tuple[str, str]]) -> str:
+    """Format (netlist text, fun_graph.json text) pairs as few-shot examples."""
+    if not examples:
+        return ""
+    blocks = [EXAMPLE_TEMPLATE.format(i=i, netlist=n, fun_graph=g) for i, (n, g) in enumerate(examples, 1)]
+    return "Functional graphs of structurally similar circuits, for reference:\n\n" + "".join(blocks)
+
+
+def load_examples(index_path: str, netlist_path: str, netlist_text: str, k: int) -> List[Tuple[str, str]]:
+    """Netlists and fun graphs of the k indexed circuits most similar to this netlist."""
+    from graph_io import load_netlist_parser
+    from similarity_index import similar_fun_graphs
+
+    graph = load_netlist_parser().netlist_to_graph_json(netlist_text)
+    this_dir = os.path.normpath(os.path.dirname(netlist_path) or ".")
+    examples = []
+    for circuit_dir, score in similar_fun_graphs(index_path, graph, k, exclude=this_dir):
+        example_netlist = find_netlist_in_dir(circuit_dir)
+        if not example_netlist:
+            continue
+        with open(example_netlist, "r") as f:
+            n = f.read().strip()
+        with open(os.path.join(circuit_dir, "fun_graph.json"), "r") as f:
+            g = f.read().strip()
+        print(f"Using example {circuit_dir} (similarity {score:.3f})", file=sys.stderr)
+        examples.append((n, g))
+    return examples
+
+
+def build_prompt(netlist_text: str, examples: Optional[List[Tuple[str, str]]] = None) -> str:
+    return PROMPT_TEMPLATE.format(netlist=netlist_text, examples=build_examples(examples or []))
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Insert netlist into functional-graph prompt template and write to circuit dir")
     group = p.add_mutually_exclusive_group(required=True)
     group.add_argument("--circuit", help="Path to a circuit directory (looks for .cir/.sp files inside)")
     group.add_argument("--netlist", help="Path to a specific netlist file")
     p.add_argument("--out", help="Output file path (defaults to <circuit>/graph_query_prompt.txt)")
-    args = p.parse_args()
+    p.add_argument("--examples-index", help="Similarity index (.npz) to draw few-shot fun_graph.json examples from")
+    p.add_argument("--num-examples", type=int, default=2, help="Number of few-shot examples (default: 2)")
+    p.add_argument("--compact", action="store_true",
+                   help="Embed the canonical netlist (device lines only, see canonicalize_netlist.py)")
+    p.add_argument("--rename-nets", action="store_true",
+                   help="Shorten auto-generated net names and write <netlist dir>/net_map.json (implies --compact)")
+    args = p.parse_args(argv)
 
     netlist_path = args.netlist
     if args.circuit:
@@ -97,7 +142,18 @@ def main():
     with open(netlist_path, "r") as f:
         netlist_text = f.read().strip()
 
-    prompt = build_prompt(netlist_text)
+    examples = None
+    if args.examples_index:
+        examples = load_examples(args.examples_index, netlist_path, netlist_text, args.num_examples)
+    prompt = build_prompt(netlist_text, examples)
+    if args.compact or args.rename_nets:
+        from canonicalize_netlist import canonicalize, compact_netlist, report_savings
+        full_prompt = prompt
+        if examples:
+            # examples keep their net names so they still match their fun_graph.json
+            examples = [(canonicalize(n)[0], g) for n, g in examples]
+        prompt = build_prompt(compact_netlist(netlist_path, netlist_text, args.rename_nets), examples)
+        report_savings("Prompt", full_prompt, prompt, sys.stderr)
 
     if args.out:
         out_path = args.out
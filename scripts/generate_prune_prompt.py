@@ -9,25 +9,18 @@ Usage examples:
   # point to a specific netlist file, print to stdout
   python scripts/generate_prune_prompt.py --netlist netlists/diff_amps/75/75.cir
 
+  # embed only the device lines of a runnable netlist
+  python scripts/generate_prune_prompt.py --netlist netlists/diff_amps/86/86_gpt.sp --compact
+
 The script writes a plain-text prompt by default. Use --jsonl to write a one-line JSONL
 object with fields {"circuit_id","netlist_file","prompt"}.
 """
 import argparse
 import json
 import os
-import glob
-from typing import Optional
-
+import sys
 
-def find_netlist_in_dir(d: str) -> Optional[str]:
-    """Look for common netlist files (.cir, .sp) in a directory and return the first match."""
-    patterns = ["*.cir", "*.sp", "*.net"]
-    for p in patterns:
-        matches = glob.glob(os.path.join(d, p))
-        if matches:
-            # return the first non-empty candidate
-            return matches[0]
-    return None
+from graph_io import find_netlist_in_dir
 
 
 PROMPT_TEMPLATE = (
@@ -45,7 +38,7 @@ def build_prompt(netlist_text: str, netlist_file: str, n: int = 3) -> str:
     return PROMPT_TEMPLATE.format(n=n, netlist_file=os.path.basename(netlist_file), netlist=netlist_text)
 
 
-def main():
+def main(argv=None):
     p = argparse.ArgumentParser(description="Generate a prune prompt from a netlist or circuit directory")
     group = p.add_mutually_exclusive_group(required=True)
     group.add_argument("--circuit", help="Path to a circuit directory (looks for .cir/.sp files inside)")
@@ -53,7 +46,11 @@ def main():
     p.add_argument("--out", help="Output file to write prompt (default: prints to stdout)")
     p.add_argument("--jsonl", action="store_true", help="Write prompt as a one-line JSONL object")
     p.add_argument("--n", type=int, default=3, help="Number of components to request (default: 3)")
-    args = p.parse_args()
+    p.add_argument("--compact", action="store_true",
+                   help="Embed the canonical netlist (device lines only, see canonicalize_netlist.py)")
+    p.add_argument("--rename-nets", action="store_true",
+                   help="Shorten auto-generated net names and write <netlist dir>/net_map.json (implies --compact)")
+    args = p.parse_args(argv)
 
     netlist_path = args.netlist
     if args.circuit:
@@ -70,6 +67,11 @@ def main():
         netlist_text = f.read().strip()
 
     prompt = build_prompt(netlist_text, netlist_path, n=args.n)
+    if args.compact or args.rename_nets:
+        from canonicalize_netlist import compact_netlist, report_savings
+        full_prompt = prompt
+        prompt = build_prompt(compact_netlist(netlist_path, netlist_text, args.rename_nets), netlist_path, n=args.n)
+        report_savings("Prompt", full_prompt, prompt, sys.stderr)
 
     if args.jsonl:
         obj = {"circuit_id": os.path.basename(os.path.dirname(netlist_path)),
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Zero-copy views of `comb_graph_gnn.npz` for analysis and training code.
+
+`GNNArrays.load(path)` reads the arrays once; every adapter then reuses them:
+- `x`: the feature matrix as stored
+- `edge_index`: [2, E] CSR-ordered edges as stored (both directions of each
+  undirected edge)
+- `to_csr()`: `scipy.sparse.csr_matrix` whose `indices`/`indptr` are the stored
+  `edge_index[1]`/`indptr` arrays (only the all-ones `data` is allocated)
+- `to_networkx()`: an undirected `networkx.Graph` built in bulk from the edge
+  arrays (node ids and types as attributes), instead of
+  `json_graph.node_link_graph` over per-link dicts
+
+Files written before `edge_index`/`indptr` were added to the npz are converted
+from the dense `adjacency` once on load.
+
+SciPy and networkx are only imported by the adapters that need them.
+
+Usage:
+  python scripts/graph_adapters.py netlists/diff_amps/84/
+"""
+import argparse
+import os
+from typing import Any, Dict, List, Optional
+
+from comb_graph_to_gnn import NODE_TYPES, csr_arrays, load_numpy
+from graph_io import load_json, resolve_input
+
+
+class GNNArrays:
+    """Node ids, features and CSR edges of one combined graph."""
+
+    def __init__(self, nodes, x, edge_index, indptr, meta: Optional[Dict[str, Any]] = None):
+        self.np = load_numpy()
+        self.nodes = nodes
+        self.x = x
+        self.edge_index = edge_index
+        self.indptr = indptr
+        self.meta = meta or {}
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def num_edges(self) -> int:
+        return self.edge_index.shape[1]
+
+    @classmethod
+    def load(cls, path: str) -> "GNNArrays":
+        """Load `comb_graph_gnn.npz` (file or its directory) and its metadata if present."""
+        np = load_numpy()
+        npz_path = resolve_input(path, "comb_graph_gnn.npz")
+        with np.load(npz_path, allow_pickle=True) as data:
+            nodes, x = data["nodes"], data["features"]
+            if "edge_index" in data.files:
+                edge_index, indptr = data["edge_index"], data["indptr"]
+            else:
+                edge_index, indptr = csr_arrays(data["adjacency"], np)
+        meta_path = os.path.join(os.path.dirname(npz_path), "comb_graph_gnn_meta.json")
+        meta = load_json(meta_path) if os.path.exists(meta_path) else None
+        return cls(nodes, x, edge_index, indptr, meta)
+
+    def node_types(self) -> List[str]:
+        """Node type names from the one-hot type block of the features."""
+        type_order = self.meta.get("type_order", NODE_TYPES)
+        block = self.x[:, :len(type_order)]
+        codes = self.np.argmax(block, axis=1).tolist()
+        has_type = (block.max(axis=1) > 0).tolist()
+        return [type_order[c] if ok else "unknown" for c, ok in zip(codes, has_type)]
+
+    def to_csr(self):
+        """Adjacency as `scipy.sparse.csr_matrix` sharing `edge_index[1]` and `indptr`."""
+        import scipy.sparse as sp
+        data = self.np.ones(self.num_edges, dtype=self.np.uint8)
+        return sp.csr_matrix((data, self.edge_index[1], self.indptr),
+                             shape=(self.num_nodes, self.num_nodes), copy=False)
+
+    def to_networkx(self, node_attrs: bool = True):
+        """Undirected `networkx.Graph` on integer nodes 0..N-1 (`id`/`type` attributes)."""
+        import networkx as nx
+        G = nx.Graph()
+        if node_attrs:
+            G.add_nodes_from((i, {"id": nid, "type": t})
+                             for i, (nid, t) in enumerate(zip(self.nodes.tolist(), self.node_types())))
+        else:
+            G.add_nodes_from(range(self.num_nodes))
+        src, dst = self.edge_index
+        # each undirected edge is stored in both directions (a self-loop once); add it once
+        upper = src <= dst
+        G.add_edges_from(zip(src[upper].tolist(), dst[upper].tolist()))
+        return G
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Summarize the sparse/networkx views of comb_graph_gnn.npz")
+    p.add_argument("path", help="comb_graph_gnn.npz or its directory")
+    p.add_argument("--networkx", action="store_true", help="Also build the networkx view")
+    args = p.parse_args(argv)
+
+    if load_numpy() is None:
+        raise SystemExit("graph_adapters requires numpy")
+    g = GNNArrays.load(args.path)
+    np = g.np
+    csr = g.to_csr()
+    print(f"nodes={g.num_nodes} edges={g.num_edges} x={tuple(g.x.shape)} edge_index dtype={g.edge_index.dtype}")
+    print(f"csr nnz={csr.nnz} shares indices={np.shares_memory(csr.indices, g.edge_index)} "
+          f"shares indptr={np.shares_memory(csr.indptr, g.indptr)}")
+    if args.networkx:
+        G = g.to_networkx()
+        print(f"networkx nodes={G.number_of_nodes()} edges={G.number_of_edges()}")
+
+
+if __name__ == "__main__":
+    main()
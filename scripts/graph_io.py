@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Small I/O helpers shared by the pipeline scripts.
+
+Kept free of heavy imports (NumPy etc.) so every stage can import it at
+startup without cost.
+"""
+import glob
+import importlib
+import json
+import os
+import sys
+from typing import Any, Dict, Optional
+
+NETLIST_PATTERNS = ("*.cir", "*.sp", "*.net")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_json(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_json(obj: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2)
+
+
+def resolve_input(path: str, default_filename: str) -> str:
+    """If `path` is a directory, return `<path>/<default_filename>` (which must exist)."""
+    if os.path.isdir(path):
+        candidate = os.path.join(path, default_filename)
+        if not os.path.exists(candidate):
+            raise FileNotFoundError(f"Expected file '{default_filename}' inside directory {path}")
+        return candidate
+    return path
+
+
+def resolve_output(path: str, default_filename: str) -> str:
+    """If `path` is a directory, return `<path>/<default_filename>`."""
+    if os.path.isdir(path):
+        return os.path.join(path, default_filename)
+    return path
+
+
+def find_netlist_in_dir(d: str) -> Optional[str]:
+    """Look for common netlist files (.cir, .sp, .net) in a directory and return the first match."""
+    for p in NETLIST_PATTERNS:
+        matches = sorted(glob.glob(os.path.join(d, p)))
+        if matches:
+            return matches[0]
+    return None
+
+
+def load_netlist_parser():
+    """Import `get_netlist_to_SG` (which lives at the repository root) from a script in scripts/."""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    return importlib.import_module("get_netlist_to_SG")
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Answer connectivity queries over a structural graph (`str_graph.json`).
+
+`GraphIndex` builds its lookup tables once per graph:
+- net -> [(device, role)] incidence (role is D/G/S for MOS terminals, `p<i>` for
+  the i-th pin of other devices)
+- device -> [(role, net)]
+- node type -> [node ids]
+- undirected neighbor lists for k-hop queries
+
+after which each query costs O(degree) (k-hop: O(size of the neighborhood)).
+
+Names may be given with or without their prefix (`net08` / `net:net08`,
+`M2` / `dev:M2`). For k-hop queries, which accept any node, a bare name is
+looked up as a device first, then as a net.
+
+Usage:
+  python scripts/graph_query.py --graph netlists/diff_amps/84/ --net net08
+  python scripts/graph_query.py --graph netlists/diff_amps/84/ --drivers VOUT1
+  python scripts/graph_query.py --graph netlists/diff_amps/84/ --gates VB2
+  python scripts/graph_query.py --graph netlists/diff_amps/84/ --khop dev:M2 --k 2
+  python scripts/graph_query.py --graph netlists/diff_amps/84/ --queries queries.txt
+
+A queries file holds one query per line: `<op> <name> [k]` with op in
+net, drivers, gates, device, khop, type, shared (shared takes two device names).
+A malformed line yields an `error` record instead of a `result` and the
+remaining queries still run.
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from graph_io import load_json, resolve_input
+
+# roles through which a device drives a net: MOS drain/source (source followers),
+# the output port (first two pins) of independent and controlled sources
+MOS_DRIVER_ROLES = ("D", "S")
+SOURCE_DRIVER_ROLES = ("p0", "p1")
+SOURCE_TYPES = ("vsource", "isource", "vcvs", "vccs", "cccs", "ccvs")
+
+# op -> (min, max) number of arguments
+QUERY_ARITY = {
+    "net": (1, 1), "drivers": (1, 1), "gates": (1, 1), "device": (1, 1),
+    "shared": (2, 2), "khop": (1, 2), "type": (1, 1),
+}
+
+
+class GraphIndex:
+    """Prebuilt incidence/adjacency indexes over a node-link structural graph."""
+
+    def __init__(self, graph: Dict[str, Any]):
+        self.node_types: Dict[str, str] = {}
+        self.device_types: Dict[str, str] = {}
+        self.nodes_by_type: Dict[str, List[str]] = defaultdict(list)
+        self.neighbors: Dict[str, List[str]] = defaultdict(list)
+        self.net_devices: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        self.device_nets: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+
+        terminals: Dict[str, Tuple[str, str]] = {}
+        for n in graph.get("nodes", []):
+            nid = n["id"]
+            ntype = n.get("type")
+            self.node_types[nid] = ntype
+            self.nodes_by_type[ntype].append(nid)
+            if ntype == "device":
+                self.device_types[nid] = (n.get("device_type") or "").lower()
+            elif ntype == "terminal":
+                terminals[nid] = (f"dev:{n.get('device')}", n.get("role"))
+
+        pin_count: Dict[str, int] = defaultdict(int)
+        for l in graph.get("links", []):
+            s, t = l["source"], l["target"]
+            self.neighbors[s].append(t)
+            self.neighbors[t].append(s)
+            if self.node_types.get(t) != "net":
+                continue
+            if s in terminals:
+                dev, role = terminals[s]
+            elif self.node_types.get(s) == "device":
+                dev, role = s, f"p{pin_count[s]}"
+                pin_count[s] += 1
+            else:
+                continue
+            self.net_devices[t].append((dev, role))
+            self.device_nets[dev].append((role, t))
+
+    @staticmethod
+    def net_id(name: str) -> str:
+        return name if name.startswith("net:") else f"net:{name}"
+
+    @staticmethod
+    def device_id(name: str) -> str:
+        return name if name.startswith("dev:") else f"dev:{name}"
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Node id for `name`: an exact id, else the device, else the net of that name."""
+        for nid in (name, self.device_id(name), self.net_id(name)):
+            if nid in self.node_types:
+                return nid
+        return None
+
+    def devices_on_net(self, net: str) -> List[Tuple[str, str]]:
+        """All (device, role) pairs connected to `net`."""
+        return list(self.net_devices.get(self.net_id(net), ()))
+
+    def drivers(self, net: str) -> List[Tuple[str, str]]:
+        """Devices that can drive `net`: MOS drains and sources, and output pins of sources.
+
+        Passives and devices whose pin roles are unknown (subckt instances,
+        diodes, BJTs) are not counted; `devices_on_net` lists every connection.
+        """
+        return [(d, r) for d, r in self.net_devices.get(self.net_id(net), ())
+                if r in MOS_DRIVER_ROLES
+                or (r in SOURCE_DRIVER_ROLES and self.device_types.get(d) in SOURCE_TYPES)]
+
+    def gates_on(self, net: str) -> List[str]:
+        """Devices whose gate is tied to `net`."""
+        return [d for d, r in self.net_devices.get(self.net_id(net), ()) if r == "G"]
+
+    def nets_of(self, device: str) -> List[Tuple[str, str]]:
+        """(role, net) pairs of `device`."""
+        return list(self.device_nets.get(self.device_id(device), ()))
+
+    def shared_nets(self, dev_a: str, dev_b: str) -> List[str]:
+        """Nets connected to both devices."""
+        nets_b = {n for _, n in self.device_nets.get(self.device_id(dev_b), ())}
+        out: List[str] = []
+        for _, n in self.device_nets.get(self.device_id(dev_a), ()):
+            if n in nets_b and n not in out:
+                out.append(n)
+        return out
+
+    def k_hop(self, node: str, k: int) -> Set[str]:
+        """Node ids within `k` hops of `node` (including it)."""
+        node = self.resolve(node)
+        if node is None:
+            return set()
+        seen = {node}
+        frontier = [node]
+        for _ in range(k):
+            nxt = []
+            for u in frontier:
+                for v in self.neighbors.get(u, ()):
+                    if v not in seen:
+                        seen.add(v)
+                        nxt.append(v)
+            if not nxt:
+                break
+            frontier = nxt
+        return seen
+
+    def nodes_of_type(self, node_type: str) -> List[str]:
+        return list(self.nodes_by_type.get(node_type, ()))
+
+
+def run_query(index: GraphIndex, op: str, args: List[str]) -> Any:
+    """Run one query; raises ValueError for an unknown op or wrong arguments."""
+    if op not in QUERY_ARITY:
+        raise ValueError(f"Unknown query op: {op}")
+    lo, hi = QUERY_ARITY[op]
+    if not lo <= len(args) <= hi:
+        expected = str(lo) if lo == hi else f"{lo}-{hi}"
+        raise ValueError(f"Query op {op!r} takes {expected} argument(s), got {len(args)}")
+    if op == "net":
+        return index.devices_on_net(args[0])
+    if op == "drivers":
+        return index.drivers(args[0])
+    if op == "gates":
+        return index.gates_on(args[0])
+    if op == "device":
+        return index.nets_of(args[0])
+    if op == "shared":
+        return index.shared_nets(args[0], args[1])
+    if op == "khop":
+        k = int(args[1]) if len(args) > 1 else 1
+        return sorted(index.k_hop(args[0], k))
+    return index.nodes_of_type(args[0])
+
+
+def run_query_lines(index: GraphIndex, lines) -> None:
+    """Run one query per line and print one JSON record each."""
+    for line in lines:
+        parts = line.split()
+        if not parts or parts[0].startswith("#"):
+            continue
+        record: Dict[str, Any] = {"query": line.strip()}
+        try:
+            record["result"] = run_query(index, parts[0], parts[1:])
+        except ValueError as e:
+            record["error"] = str(e)
+        print(json.dumps(record))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Query nets/devices of a structural graph")
+    p.add_argument("--graph", required=True, help="Path to str_graph.json or directory containing it")
+    p.add_argument("--net", help="List (device, role) pairs on a net")
+    p.add_argument("--drivers", help="List devices driving a net")
+    p.add_argument("--gates", help="List devices whose gate ties to a net")
+    p.add_argument("--device", help="List (role, net) pairs of a device")
+    p.add_argument("--khop", help="List nodes within --k hops of a node id")
+    p.add_argument("--k", type=int, default=1, help="Hop count for --khop (default: 1)")
+    p.add_argument("--queries", help="File with one query per line ('-' for stdin); prints one JSON result per line")
+    args = p.parse_args(argv)
+
+    index = GraphIndex(load_json(resolve_input(args.graph, "str_graph.json")))
+
+    if args.queries:
+        if args.queries == "-":
+            run_query_lines(index, sys.stdin)
+        else:
+            with open(args.queries, "r") as f:
+                run_query_lines(index, f)
+        return
+
+    ran = False
+    for op, value in (("net", args.net), ("drivers", args.drivers), ("gates", args.gates),
+                      ("device", args.device)):
+        if value:
+            print(json.dumps(run_query(index, op, [value])))
+            ran = True
+    if args.khop:
+        print(json.dumps(run_query(index, "khop", [args.khop, str(args.k)])))
+        ran = True
+    if not ran:
+        p.error("no query given (use --net/--drivers/--gates/--device/--khop/--queries)")
+
+
+if __name__ == "__main__":
+    main()
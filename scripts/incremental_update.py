@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Incrementally update a circuit's graphs after a netlist edit.
+
+Instead of rerunning every stage, the edited netlist is diffed against the
+device set of the cached `str_graph.json` (device name -> nets/type). For each
+added, removed or rewired device only its own nodes and links change:
+- device/terminal nodes are added, removed or updated in place
+- net nodes are added when first referenced and removed once unconnected
+- in the combined graph, MOS device -> `W_`/`L_` parameter links follow the
+  device (parameter nodes that only existed for a removed device are dropped)
+- in `comb_graph_gnn.npz`, adjacency entries and feature rows of touched nodes
+  are patched in place; rows/columns are appended for new nodes and deleted
+  for removed ones
+
+A device name that appears on several lines is handled like the full parser
+does: the lines are merged into one device whose links are those of all its
+lines (MOS terminals then connect to one net per line).
+
+Node order after an update is: surviving nodes in their previous order, then
+new nodes, so the npz rows stay aligned with `comb_graph.json`.
+
+Usage:
+  python scripts/incremental_update.py --dir netlists/diff_amps/84/ --netlist edited.cir
+
+From Python, keep an `IncrementalGraphs` alive across edits:
+  graphs = IncrementalGraphs.load("netlists/diff_amps/84/")
+  graphs.update(netlist_text)
+  graphs.save("netlists/diff_amps/84/")
+"""
+import argparse
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from combine_graphs import add_device_parameter_links, merge_links
+from comb_graph_to_gnn import build_feature_matrix, csr_arrays, load_numpy
+from graph_io import load_json, load_netlist_parser, write_json
+
+sg = load_netlist_parser()
+
+# node types shared between devices: added on demand, removed when left unconnected
+SHARED_TYPES = ("net", "parameter")
+
+# (nets, device_type); MOS nets are D, G, S of each netlist line carrying the device name
+DeviceSpec = Tuple[Tuple[str, ...], str]
+
+
+def devices_from_graph(str_graph: Dict[str, Any]) -> Dict[str, DeviceSpec]:
+    """Recover `name -> (nets, device_type)` from a structural graph.
+
+    MOS devices give their D, G, S nets; other devices their nets in link order.
+    """
+    nodes = {n["id"]: n for n in str_graph.get("nodes", [])}
+    nets: Dict[str, List[str]] = {}
+    term_nets: Dict[str, List[str]] = {}
+    for l in str_graph.get("links", []):
+        s, t = l["source"], l["target"]
+        if nodes.get(t, {}).get("type") != "net":
+            continue
+        if nodes.get(s, {}).get("type") == "terminal":
+            term_nets.setdefault(s, []).append(t[len("net:"):])
+        elif nodes.get(s, {}).get("type") == "device":
+            nets.setdefault(s, []).append(t[len("net:"):])
+
+    devices: Dict[str, DeviceSpec] = {}
+    for nid, n in nodes.items():
+        if n.get("type") != "device":
+            continue
+        name = nid.split(":", 1)[1]
+        dev_type = n.get("device_type", "")
+        if sg.is_mos_device(name, dev_type):
+            # one net per terminal for every line the device was declared on
+            per_role = [term_nets.get(f"term:{name}:{r}", []) for r in ("D", "G", "S")]
+            lines = max(1, max(len(v) for v in per_role))
+            dev_nets = tuple(v[i] if i < len(v) else "" for i in range(lines) for v in per_role)
+        else:
+            dev_nets = tuple(nets.get(nid, []))
+        devices[name] = (dev_nets, dev_type)
+    return devices
+
+
+def devices_from_netlist(netlist_text: str) -> Dict[str, DeviceSpec]:
+    """Parse `name -> (nets, device_type)`; MOS nets are truncated to D, G, S as in the graph.
+
+    Repeated names are merged: their nets are concatenated and the first
+    line's device type is kept, as `add_node` does in the full parser.
+    """
+    devices: Dict[str, DeviceSpec] = {}
+    for name, node_list, dev_type in sg.iter_netlist_devices(netlist_text):
+        prev = devices.get(name)
+        if prev is not None:
+            dev_type = prev[1]
+        if sg.is_mos_device(name, dev_type):
+            node_list = node_list[:3]
+        devices[name] = ((prev[0] if prev else ()) + tuple(node_list), dev_type)
+    return devices
+
+
+def diff_devices(old: Dict[str, DeviceSpec], new: Dict[str, DeviceSpec]) -> Tuple[List[str], List[str], List[str]]:
+    """Return (added, removed, changed) device names."""
+    added = [d for d in new if d not in old]
+    removed = [d for d in old if d not in new]
+    changed = [d for d in new if d in old and new[d] != old[d]]
+    return added, removed, changed
+
+
+def device_subgraph(devices: Dict[str, DeviceSpec], names: List[str], with_params: bool) -> Dict[str, Any]:
+    """Nodes/links the given devices contribute (plus device->W_/L_ links if `with_params`)."""
+    g: Dict[str, Any] = {"nodes": [], "links": []}
+    for name in names:
+        nets, dev_type = devices[name]
+        if sg.is_mos_device(name, dev_type) and len(nets) > 3:
+            for i in range(0, len(nets), 3):
+                sg.add_device(g, name, list(nets[i:i + 3]), dev_type)
+        else:
+            sg.add_device(g, name, list(nets), dev_type)
+    g.pop("nodes_index", None)
+    if with_params:
+        # the combined graph keeps one copy of each link (combine_graphs.merge_links)
+        g["links"] = merge_links(g["links"], [])
+        add_device_parameter_links(g["nodes"], g["links"], [n for n in g["nodes"] if n["type"] == "device"])
+    return g
+
+
+def compute_delta(graph: Dict[str, Any], old_sub: Dict[str, Any], new_sub: Dict[str, Any]) -> Dict[str, Any]:
+    """Diff the old and new contribution of the edited devices against `graph`.
+
+    Links are compared as multisets: a merged device (see
+    `devices_from_netlist`) can contribute the same link more than once.
+    """
+    old_nodes = {n["id"]: n for n in old_sub["nodes"]}
+    new_nodes = {n["id"]: n for n in new_sub["nodes"]}
+    old_links = Counter((l["source"], l["target"]) for l in old_sub["links"])
+    new_links = Counter((l["source"], l["target"]) for l in new_sub["links"])
+    existing = {n["id"]: n for n in graph["nodes"]}
+
+    removed_links = old_links - new_links
+    to_add = new_links - old_links
+    added_links: List[Tuple[str, str]] = []
+    for l in new_sub["links"]:
+        key = (l["source"], l["target"])
+        if to_add[key] > 0:
+            to_add[key] -= 1
+            added_links.append(key)
+
+    removed: Set[str] = {nid for nid, n in old_nodes.items()
+                         if n["type"] not in SHARED_TYPES and nid not in new_nodes}
+    added: List[Dict[str, Any]] = [n for nid, n in new_nodes.items() if nid not in existing]
+    updated: List[Dict[str, Any]] = []
+    for nid, n in new_nodes.items():
+        cur = existing.get(nid)
+        if cur is not None and n["type"] not in SHARED_TYPES and any(cur.get(k) != v for k, v in n.items()):
+            updated.append(dict(cur, **n))
+
+    # shared nodes the old devices touched become removable once unconnected
+    # and links whose every instance goes away are cleared from the adjacency
+    candidates = {nid for nid, n in old_nodes.items() if n["type"] in SHARED_TYPES and nid not in new_nodes}
+    degree = dict.fromkeys(candidates, 0)
+    remaining = Counter()
+    pending = Counter(removed_links)
+    for l in graph["links"]:
+        key = (l["source"], l["target"])
+        if pending[key] > 0:
+            pending[key] -= 1
+            continue
+        if key in removed_links:
+            remaining[key] += 1
+        for end in key:
+            if end in degree:
+                degree[end] += 1
+    removed |= {nid for nid, d in degree.items() if d == 0}
+
+    return {
+        "removed_nodes": sorted(removed),
+        "added_nodes": added,
+        "updated_nodes": updated,
+        "removed_links": sorted(removed_links.elements()),
+        "unlinked": sorted(k for k in removed_links if not remaining[k]),
+        "added_links": added_links,
+    }
+
+
+def apply_delta(graph: Dict[str, Any], delta: Dict[str, Any]) -> None:
+    """Apply a delta to a node-link graph dict in place."""
+    removed = set(delta["removed_nodes"])
+    updated = {n["id"]: n for n in delta["updated_nodes"]}
+    nodes = [updated.get(n["id"], n) for n in graph["nodes"] if n["id"] not in removed]
+    nodes.extend(delta["added_nodes"])
+    pending = Counter(map(tuple, delta["removed_links"]))
+    links = []
+    for l in graph["links"]:
+        key = (l["source"], l["target"])
+        if pending[key] > 0:
+            pending[key] -= 1
+        elif l["source"] not in removed and l["target"] not in removed:
+            links.append(l)
+    links.extend({"source": s, "target": t} for s, t in delta["added_links"])
+    graph["nodes"] = nodes
+    graph["links"] = links
+
+
+def patch_gnn_arrays(gnn: Dict[str, Any], meta: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Patch `nodes`/`features`/`adjacency` arrays for a combined-graph delta."""
+    np = load_numpy()
+    nodes = gnn["nodes"]
+    features = gnn["features"]
+    adjacency = gnn["adjacency"]
+    id2idx = {nid: i for i, nid in enumerate(nodes.tolist())}
+    perf, subs = meta["performance_meanings"], meta["substructure_types"]
+
+    # in place: dropped links and feature rows of updated nodes
+    for s, t in delta["unlinked"]:
+        if s in id2idx and t in id2idx:
+            adjacency[id2idx[s], id2idx[t]] = 0
+            adjacency[id2idx[t], id2idx[s]] = 0
+    if delta["updated_nodes"]:
+        rows, _, _ = build_feature_matrix(delta["updated_nodes"], perf, subs)
+        for n, row in zip(delta["updated_nodes"], rows):
+            features[id2idx[n["id"]]] = row
+
+    if delta["removed_nodes"]:
+        drop = [id2idx[nid] for nid in delta["removed_nodes"] if nid in id2idx]
+        nodes = np.delete(nodes, drop)
+        features = np.delete(features, drop, axis=0)
+        adjacency = np.delete(np.delete(adjacency, drop, axis=0), drop, axis=1)
+
+    added = delta["added_nodes"]
+    if added:
+        rows, D, _ = build_feature_matrix(added, perf, subs)
+        if D != features.shape[1]:
+            raise ValueError(f"Feature dim changed ({features.shape[1]} -> {D}); run a full rebuild")
+        N, K = len(nodes), len(added)
+        nodes = np.concatenate([nodes, np.array([n["id"] for n in added], dtype=object)])
+        features = np.concatenate([features, np.asarray(rows, dtype=features.dtype)])
+        grown = np.zeros((N + K, N + K), dtype=adjacency.dtype)
+        grown[:N, :N] = adjacency
+        adjacency = grown
+
+    if delta["removed_nodes"] or added:
+        id2idx = {nid: i for i, nid in enumerate(nodes.tolist())}
+    for s, t in delta["added_links"]:
+        if s in id2idx and t in id2idx:
+            adjacency[id2idx[s], id2idx[t]] = 1
+            adjacency[id2idx[t], id2idx[s]] = 1
+    return {"nodes": nodes, "features": features, "adjacency": adjacency}
+
+
+class IncrementalGraphs:
+    """Cached str/comb graphs (and optionally GNN arrays) that follow netlist edits."""
+
+    def __init__(self,
+                 str_graph: Dict[str, Any],
+                 comb_graph: Optional[Dict[str, Any]] = None,
+                 gnn: Optional[Dict[str, Any]] = None,
+                 meta: Optional[Dict[str, Any]] = None):
+        self.str_graph = str_graph
+        self.comb_graph = comb_graph
+        self.gnn = gnn
+        self.meta = meta
+        self.devices = devices_from_graph(str_graph)
+
+    @classmethod
+    def load(cls, circuit_dir: str) -> "IncrementalGraphs":
+        str_graph = load_json(os.path.join(circuit_dir, "str_graph.json"))
+        comb_path = os.path.join(circuit_dir, "comb_graph.json")
+        comb_graph = load_json(comb_path) if os.path.exists(comb_path) else None
+        gnn = meta = None
+        npz_path = os.path.join(circuit_dir, "comb_graph_gnn.npz")
+        np = load_numpy()
+        if comb_graph is not None and np is not None and os.path.exists(npz_path):
+            with np.load(npz_path, allow_pickle=True) as data:
+                gnn = {k: data[k] for k in ("nodes", "features", "adjacency")}
+            meta = load_json(os.path.join(circuit_dir, "comb_graph_gnn_meta.json"))
+        return cls(str_graph, comb_graph, gnn, meta)
+
+    def update(self, netlist_text: str) -> Dict[str, Any]:
+        """Apply a new netlist revision; returns a summary of what changed."""
+        new_devices = devices_from_netlist(netlist_text)
+        added, removed, changed = diff_devices(self.devices, new_devices)
+        summary: Dict[str, Any] = {"added": added, "removed": removed, "changed": changed}
+        if not (added or removed or changed):
+            return summary
+
+        old_names, new_names = removed + changed, added + changed
+        old_sub = device_subgraph(self.devices, old_names, with_params=False)
+        new_sub = device_subgraph(new_devices, new_names, with_params=False)
+        delta = compute_delta(self.str_graph, old_sub, new_sub)
+        apply_delta(self.str_graph, delta)
+        summary["str_delta"] = {k: len(v) for k, v in delta.items()}
+
+        if self.comb_graph is not None:
+            old_sub = device_subgraph(self.devices, old_names, with_params=True)
+            new_sub = device_subgraph(new_devices, new_names, with_params=True)
+            comb_delta = compute_delta(self.comb_graph, old_sub, new_sub)
+            apply_delta(self.comb_graph, comb_delta)
+            summary["comb_delta"] = {k: len(v) for k, v in comb_delta.items()}
+            if self.gnn is not None:
+                self.gnn = patch_gnn_arrays(self.gnn, self.meta, comb_delta)
+
+        self.devices = new_devices
+        return summary
+
+    def save(self, out_dir: str) -> None:
+        os.makedirs(out_dir, exist_ok=True)
+        write_json(self.str_graph, os.path.join(out_dir, "str_graph.json"))
+        if self.comb_graph is not None:
+            write_json(self.comb_graph, os.path.join(out_dir, "comb_graph.json"))
+        if self.gnn is not None:
+            np = load_numpy()
+            edge_index, indptr = csr_arrays(self.gnn["adjacency"], np)
+            np.savez_compressed(os.path.join(out_dir, "comb_graph_gnn.npz"), **self.gnn,
+                                edge_index=edge_index, indptr=indptr)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Incrementally update cached graphs after a netlist edit")
+    p.add_argument("--dir", required=True, help="Circuit directory holding str_graph.json (and comb_graph.json / npz)")
+    p.add_argument("--netlist", required=True, help="Edited netlist")
+    p.add_argument("--out-dir", help="Where to write updated outputs (defaults to --dir)")
+    args = p.parse_args(argv)
+
+    graphs = IncrementalGraphs.load(args.dir)
+    with open(args.netlist, "r") as f:
+        summary = graphs.update(f.read())
+    graphs.save(args.out_dir or args.dir)
+    print(f"Added {len(summary['added'])}, removed {len(summary['removed'])}, "
+          f"changed {len(summary['changed'])} devices; wrote {args.out_dir or args.dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Ingest a multi-circuit corpus into one packed structural-graph dataset.
+
+Inputs can be:
+- a concatenated text file with one header comment per circuit, e.g.
+  `* AnalogGenie 84` or `* Masala Chai SPICE netlist 2382`
+- a tar archive (plain or compressed) or zip archive of netlist files; each
+  member may itself hold several circuits separated by headers
+
+The input is split into shards at circuit boundaries without unpacking it:
+for text files and plain tar archives each shard is a byte range that a
+worker process reads directly; zip members are opened by the worker;
+compressed tar members are read sequentially and handed to the workers. Each
+worker parses its circuits with `netlist_to_graph_json` and returns flat
+arrays, which are concatenated into a single `.npz`:
+- `circuit_ids` [C]; `node_ptr`, `edge_ptr` [C+1] offsets into the arrays below
+- `node_ids` [N_total]; `node_type` [N_total] int8 index into `type_order`
+  (a node type outside `type_order` is an error)
+- `node_attr` [N_total]: device_type for devices, role for terminals, else ""
+- `edges` [E_total, 2] int32, indices local to each circuit
+- `type_order`
+- `failed_ids`: circuits that could not be parsed (reported on stderr and
+  left out of the arrays above)
+
+Text before the first header that holds more than comments (e.g. devices of
+a circuit whose header is missing) is kept as a circuit of its own, named
+after the file or archive member, and reported on stderr.
+
+Usage:
+  python scripts/ingest_corpus.py analoggenie.txt --out analoggenie_packed.npz --workers 8
+  python scripts/ingest_corpus.py masala_chai.tar.gz corpus.zip --out packed.npz
+
+Read a circuit back with `PackedCorpus("packed.npz").graph(i)`.
+
+With `--profile-jsonl` (see profiling.py) the run is recorded as the stages
+`parse_shards` (sharding plus the parallel parse, with circuit/node/edge
+counts), `merge_packed` and `write_packed`.
+"""
+import argparse
+import io
+import mmap
+import os
+import re
+import sys
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from comb_graph_to_gnn import NODE_TYPES, load_numpy
+from graph_io import NETLIST_PATTERNS, load_netlist_parser
+from profiling import StageProfiler, add_profiling_args, profiler_from_args
+
+sg = load_netlist_parser()
+
+DEFAULT_HEADER_RE = rb"^\*[ \t]*(?:AnalogGenie|Masala[ \t]+Chai(?:[ \t]+SPICE[ \t]+netlist)?)[ \t]+(\S+)[ \t]*\r?$"
+NETLIST_SUFFIXES = tuple(p[1:] for p in NETLIST_PATTERNS)
+DEFAULT_SHARD_BYTES = 4 << 20
+
+# a line that is not blank and not a `*` / `//` comment
+CONTENT_LINE_RE = re.compile(rb"^[ \t]*(?![*\r\n]|//)\S", re.M)
+
+# (circuit id, netlist text)
+Circuit = Tuple[str, str]
+
+
+def split_circuits(data: bytes, header_re: "re.Pattern", default_id: str) -> List[Tuple[str, int, int]]:
+    """Return (circuit id, start, end) byte ranges; a text without headers is one circuit.
+
+    Text before the first header is kept as circuit `default_id` unless it
+    only holds comments and blank lines.
+    """
+    heads = [(m.group(1).decode("utf-8", "replace"), m.start()) for m in header_re.finditer(data)]
+    if not heads:
+        return [(default_id, 0, len(data))]
+    out = []
+    first = heads[0][1]
+    if first and CONTENT_LINE_RE.search(data, 0, first):
+        print(f"{default_id}: {first} bytes before the first circuit header kept as circuit {default_id!r}",
+              file=sys.stderr)
+        out.append((default_id, 0, first))
+    for i, (cid, start) in enumerate(heads):
+        end = heads[i + 1][1] if i + 1 < len(heads) else len(data)
+        out.append((cid, start, end))
+    return out
+
+
+def make_shards(ranges: List[Tuple[str, int, int]], shard_bytes: int) -> List[List[Tuple[str, int, int]]]:
+    """Group consecutive circuit ranges into shards of about `shard_bytes`."""
+    shards: List[List[Tuple[str, int, int]]] = []
+    cur: List[Tuple[str, int, int]] = []
+    size = 0
+    for r in ranges:
+        cur.append(r)
+        size += r[2] - r[1]
+        if size >= shard_bytes:
+            shards.append(cur)
+            cur, size = [], 0
+    if cur:
+        shards.append(cur)
+    return shards
+
+
+def pack_graphs(circuits: List[Circuit]) -> Dict[str, Any]:
+    """Parse circuits and flatten their graphs into packed arrays; unparsable circuits go to `failed_ids`."""
+    np = load_numpy()
+    type_idx = {t: i for i, t in enumerate(NODE_TYPES)}
+    ids: List[str] = []
+    node_ids: List[str] = []
+    node_type: List[int] = []
+    node_attr: List[str] = []
+    edges: List[Tuple[int, int]] = []
+    node_counts: List[int] = []
+    edge_counts: List[int] = []
+    failed: List[str] = []
+    for cid, text in circuits:
+        try:
+            graph = sg.netlist_to_graph_json(text)
+        except Exception as e:  # keep going so one bad circuit does not stop a corpus run
+            print(f"FAILED {cid}: {e}", file=sys.stderr)
+            failed.append(cid)
+            continue
+        local = {}
+        for n in graph["nodes"]:
+            local[n["id"]] = len(local)
+            if n["type"] not in type_idx:
+                raise ValueError(f"{cid}: node {n['id']!r} has unknown type {n['type']!r} (expected one of {NODE_TYPES})")
+            node_ids.append(n["id"])
+            node_type.append(type_idx[n["type"]])
+            node_attr.append(n.get("device_type") or n.get("role") or "")
+        for l in graph["links"]:
+            edges.append((local[l["source"]], local[l["target"]]))
+        ids.append(cid)
+        node_counts.append(len(graph["nodes"]))
+        edge_counts.append(len(graph["links"]))
+    return {
+        "circuit_ids": ids,
+        "node_counts": np.asarray(node_counts, dtype=np.int64),
+        "edge_counts": np.asarray(edge_counts, dtype=np.int64),
+        "node_ids": node_ids,
+        "node_type": np.asarray(node_type, dtype=np.int8),
+        "node_attr": node_attr,
+        "edges": np.asarray(edges, dtype=np.int32).reshape(-1, 2),
+        "failed_ids": failed,
+    }
+
+
+def parse_byte_shard(path: str, ranges: List[Tuple[str, int, int]], header_re: bytes) -> Dict[str, Any]:
+    """Worker: read one contiguous byte range of `path` and parse the circuits in it."""
+    start, end = ranges[0][1], ranges[-1][2]
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    pattern = re.compile(header_re, re.M)
+    circuits: List[Circuit] = []
+    for cid, s, e in ranges:
+        chunk = data[s - start:e - start]
+        # a tar member without headers is split here, now that its bytes are loaded
+        for sub_id, ss, ee in split_circuits(chunk, pattern, cid):
+            circuits.append((sub_id, chunk[ss:ee].decode("utf-8", "replace")))
+    return pack_graphs(circuits)
+
+
+def parse_zip_shard(path: str, members: List[str], header_re: bytes) -> Dict[str, Any]:
+    """Worker: open zip members and parse the circuits they hold."""
+    pattern = re.compile(header_re, re.M)
+    circuits: List[Circuit] = []
+    with zipfile.ZipFile(path) as zf:
+        for name in members:
+            data = zf.read(name)
+            for cid, s, e in split_circuits(data, pattern, member_id(name)):
+                circuits.append((cid, data[s:e].decode("utf-8", "replace")))
+    return pack_graphs(circuits)
+
+
+def parse_text_shard(items: List[Tuple[str, bytes]], header_re: bytes) -> Dict[str, Any]:
+    """Worker: parse member payloads already read by the main process."""
+    pattern = re.compile(header_re, re.M)
+    circuits: List[Circuit] = []
+    for name, data in items:
+        for cid, s, e in split_circuits(data, pattern, member_id(name)):
+            circuits.append((cid, data[s:e].decode("utf-8", "replace")))
+    return pack_graphs(circuits)
+
+
+def member_id(name: str) -> str:
+    return os.path.splitext(name)[0]
+
+
+def is_netlist_member(name: str) -> bool:
+    return name.lower().endswith(NETLIST_SUFFIXES)
+
+
+def submit_input(pool: ProcessPoolExecutor, path: str, header_re: bytes, shard_bytes: int) -> list:
+    """Shard one input and submit its shards; returns futures in corpus order."""
+    futures = []
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            members = [(i.filename, i.file_size) for i in zf.infolist() if is_netlist_member(i.filename)]
+        for shard in make_shards([(n, 0, size) for n, size in members], shard_bytes):
+            futures.append(pool.submit(parse_zip_shard, path, [n for n, _, _ in shard], header_re))
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as tf:
+            compressed = tf.fileobj is not None and not isinstance(tf.fileobj, io.BufferedReader)
+            if not compressed:
+                # plain tar: each member is a byte range of the archive file
+                ranges = [(member_id(i.name), i.offset_data, i.offset_data + i.size)
+                          for i in tf if i.isfile() and is_netlist_member(i.name)]
+                for shard in make_shards(ranges, shard_bytes):
+                    futures.append(pool.submit(parse_byte_shard, path, shard, header_re))
+            else:
+                batch: List[Tuple[str, bytes]] = []
+                size = 0
+                for info in tf:
+                    if not (info.isfile() and is_netlist_member(info.name)):
+                        continue
+                    batch.append((info.name, tf.extractfile(info).read()))
+                    size += info.size
+                    if size >= shard_bytes:
+                        futures.append(pool.submit(parse_text_shard, batch, header_re))
+                        batch, size = [], 0
+                if batch:
+                    futures.append(pool.submit(parse_text_shard, batch, header_re))
+    else:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return futures
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                ranges = split_circuits(mm, re.compile(header_re, re.M), member_id(os.path.basename(path)))
+        for shard in make_shards(ranges, shard_bytes):
+            futures.append(pool.submit(parse_byte_shard, path, shard, header_re))
+    return futures
+
+
+def merge_packed(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    np = load_numpy()
+    node_counts = np.concatenate([p["node_counts"] for p in parts]) if parts else np.zeros(0, dtype=np.int64)
+    edge_counts = np.concatenate([p["edge_counts"] for p in parts]) if parts else np.zeros(0, dtype=np.int64)
+    return {
+        "circuit_ids": np.array([c for p in parts for c in p["circuit_ids"]]),
+        "node_ptr": np.concatenate([[0], np.cumsum(node_counts)]).astype(np.int64),
+        "edge_ptr": np.concatenate([[0], np.cumsum(edge_counts)]).astype(np.int64),
+        "node_ids": np.array([n for p in parts for n in p["node_ids"]]),
+        "node_type": np.concatenate([p["node_type"] for p in parts]) if parts else np.zeros(0, dtype=np.int8),
+        "node_attr": np.array([a for p in parts for a in p["node_attr"]]),
+        "edges": np.concatenate([p["edges"] for p in parts]) if parts else np.zeros((0, 2), dtype=np.int32),
+        "type_order": np.array(NODE_TYPES),
+        "failed_ids": np.array([c for p in parts for c in p["failed_ids"]], dtype=str),
+    }
+
+
+def ingest(paths: List[str], out_path: str, workers: Optional[int] = None,
+           header_re: bytes = DEFAULT_HEADER_RE, shard_bytes: int = DEFAULT_SHARD_BYTES,
+           profiler: Optional[StageProfiler] = None) -> Dict[str, Any]:
+    """Shard, parse in parallel and write the packed dataset; returns the packed arrays."""
+    np = load_numpy()
+    profiler = profiler or StageProfiler()
+    with profiler.stage("parse_shards") as rec:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for path in paths:
+                futures.extend(submit_input(pool, path, header_re, shard_bytes))
+            parts = [f.result() for f in futures]
+        rec.update(shards=len(parts), circuits=sum(len(p["circuit_ids"]) for p in parts),
+                   nodes=sum(len(p["node_ids"]) for p in parts), edges=sum(len(p["edges"]) for p in parts))
+    with profiler.stage("merge_packed"):
+        packed = merge_packed(parts)
+    with profiler.stage("write_packed"):
+        np.savez_compressed(out_path, **packed)
+    n_failed = len(packed["failed_ids"])
+    print(f"Wrote {len(packed['circuit_ids'])} circuits to {out_path}"
+          + (f" ({n_failed} failed to parse)" if n_failed else ""))
+    return packed
+
+
+class PackedCorpus:
+    """Random access to circuits of a packed dataset written by `ingest`."""
+
+    def __init__(self, path: str):
+        np = load_numpy()
+        with np.load(path) as data:
+            self.arrays = {k: data[k] for k in data.files}
+        self.circuit_ids = self.arrays["circuit_ids"]
+
+    def __len__(self) -> int:
+        return len(self.circuit_ids)
+
+    def graph(self, i: int) -> Dict[str, Any]:
+        """Rebuild the node-link `str_graph` dict of circuit `i`."""
+        a = self.arrays
+        n0, n1 = a["node_ptr"][i], a["node_ptr"][i + 1]
+        e0, e1 = a["edge_ptr"][i], a["edge_ptr"][i + 1]
+        types = a["type_order"]
+        ids = a["node_ids"][n0:n1].tolist()
+        nodes = []
+        for nid, t, attr in zip(ids, a["node_type"][n0:n1].tolist(), a["node_attr"][n0:n1].tolist()):
+            node = {"id": nid, "type": str(types[t])}
+            if node["type"] == "device":
+                node["device_type"] = attr
+            elif node["type"] == "terminal":
+                node["device"] = nid.split(":")[1]
+                node["role"] = attr
+            nodes.append(node)
+        links = [{"source": ids[s], "target": ids[t]} for s, t in a["edges"][e0:e1].tolist()]
+        return {"directed": False, "multigraph": False, "graph": {}, "nodes": nodes, "links": links}
+
+
+def parse_size(s: str) -> int:
+    units = {"k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+    s = s.strip().lower()
+    if s and s[-1] in units:
+        return int(float(s[:-1]) * units[s[-1]])
+    return int(s)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Ingest a multi-circuit corpus file/archive into a packed graph dataset")
+    p.add_argument("inputs", nargs="+", help="Concatenated netlist text files, tar or zip archives")
+    p.add_argument("--out", required=True, help="Output .npz path")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--shard-bytes", default="4M", help="Approximate shard size, e.g. 512k, 4M (default: 4M)")
+    p.add_argument("--header-regex", default=None,
+                   help="Regex (multiline) matching a circuit header line; group 1 is the circuit id")
+    add_profiling_args(p)
+    args = p.parse_args(argv)
+
+    if load_numpy() is None:
+        raise SystemExit("ingest_corpus requires numpy")
+    header_re = args.header_regex.encode() if args.header_regex else DEFAULT_HEADER_RE
+    profiler = profiler_from_args(args, circuit=args.out)
+    ingest(args.inputs, args.out, args.workers, header_re, parse_size(args.shard_bytes), profiler)
+
+
+if __name__ == "__main__":
+    main()
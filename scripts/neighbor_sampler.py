@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+k-hop neighbor sampling over the CSR form of a combined graph, for training
+on graphs too large to use whole.
+
+`CSRGraph` holds `indptr`/`indices` (row-major, one row per node) plus the
+feature matrix and node ids. It is built from `comb_graph_gnn.npz` (sharing
+its `edge_index`/`indptr` arrays, see graph_adapters.py), or straight from
+`comb_graph.json` without ever materializing an NxN matrix.
+
+`NeighborSampler.sample(seeds, fanouts)` expands the seed nodes hop by hop: at
+hop h every frontier node keeps at most `fanouts[h]` of its neighbors, chosen
+- uniformly without replacement, or
+- with probability proportional to an edge weight (`weight="degree"` favors
+  well-connected neighbors, `"inv-degree"` rare ones), using
+  Efraimidis-Spirakis keys u^(1/w)
+
+Both are computed for the whole frontier at once: one random key per candidate
+edge, a lexsort by (row, key) and a per-row rank cut-off. The result is a
+compact subgraph re-indexed to 0..n-1 (seeds first) with its feature rows.
+Sampling depends only on the seed given to the sampler.
+
+Usage:
+  python scripts/neighbor_sampler.py --gnn netlists/diff_amps/84/ --seed-type performance --fanouts 10 5
+  python scripts/neighbor_sampler.py --comb-graph big/comb_graph.json --seed-ids dev:M0 dev:M1 \\
+      --fanouts 15 10 --weight degree --batch-size 256 --out samples.npz
+"""
+import argparse
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from comb_graph_to_gnn import (NODE_TYPES, build_feature_matrix, detect_performance_meanings,
+                               detect_substructure_types, load_numpy)
+from graph_io import load_json, resolve_input
+
+WEIGHTINGS = ("uniform", "degree", "inv-degree")
+
+
+class CSRGraph:
+    """Undirected graph in CSR form with per-node features and ids."""
+
+    def __init__(self, indptr, indices, features, nodes, type_order: Sequence[str] = NODE_TYPES):
+        self.np = load_numpy()
+        self.indptr = indptr
+        self.indices = indices
+        self.features = features
+        self.nodes = nodes
+        self.type_order = list(type_order)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    def degrees(self):
+        return self.np.diff(self.indptr)
+
+    def node_types(self):
+        """Type index per node from the one-hot type block of the features (-1 if none)."""
+        np = self.np
+        block = self.features[:, :len(self.type_order)]
+        types = np.argmax(block, axis=1).astype(np.int64)
+        types[block.max(axis=1) <= 0] = -1
+        return types
+
+    def nodes_of_type(self, *types: str):
+        np = self.np
+        codes = [self.type_order.index(t) for t in types]
+        return np.flatnonzero(np.isin(self.node_types(), codes))
+
+    def node_index(self, ids: Sequence[str]):
+        pos = {nid: i for i, nid in enumerate(self.nodes.tolist())}
+        missing = [i for i in ids if i not in pos]
+        if missing:
+            raise KeyError(f"Unknown node ids: {missing[:5]}")
+        return self.np.asarray([pos[i] for i in ids], dtype=self.np.int64)
+
+    @classmethod
+    def from_edges(cls, num_nodes: int, src, dst, features, nodes, type_order: Sequence[str] = NODE_TYPES):
+        """CSR of the undirected graph with edges src[i]-dst[i] (duplicates removed)."""
+        np = load_numpy()
+        rows = np.concatenate([src, dst]).astype(np.int64)
+        cols = np.concatenate([dst, src]).astype(np.int64)
+        keys = np.sort(rows * num_nodes + cols)
+        if len(keys):
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        rows, cols = keys // num_nodes, keys % num_nodes
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+        return cls(indptr, cols, features, nodes, type_order)
+
+    @classmethod
+    def from_gnn_npz(cls, path: str) -> "CSRGraph":
+        """Load `comb_graph_gnn.npz` (file or its directory), reusing its stored CSR arrays."""
+        from graph_adapters import GNNArrays
+        g = GNNArrays.load(path)
+        return cls(g.indptr, g.edge_index[1], g.x, g.nodes, g.meta.get("type_order", NODE_TYPES))
+
+    @classmethod
+    def from_comb_graph(cls, path: str) -> "CSRGraph":
+        """Build features and CSR directly from `comb_graph.json` (file or its directory)."""
+        np = load_numpy()
+        data = load_json(resolve_input(path, "comb_graph.json"))
+        nodes = data.get("nodes", [])
+        features, _, _ = build_feature_matrix(nodes, detect_performance_meanings(nodes), detect_substructure_types(nodes))
+        id2idx = {n["id"]: i for i, n in enumerate(nodes)}
+        pairs = [(id2idx[l["source"]], id2idx[l["target"]]) for l in data.get("links", [])
+                 if l.get("source") in id2idx and l.get("target") in id2idx]
+        edges = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        return cls.from_edges(len(nodes), edges[:, 0], edges[:, 1], np.asarray(features, dtype=np.float32),
+                              np.array([n["id"] for n in nodes], dtype=object))
+
+
+class NeighborSampler:
+    """Seeded uniform / weighted k-hop neighbor sampler over a CSRGraph."""
+
+    def __init__(self, graph: CSRGraph, weight: str = "uniform", seed: Optional[int] = None):
+        if weight not in WEIGHTINGS:
+            raise ValueError(f"weight must be one of {WEIGHTINGS}, got {weight!r}")
+        self.np = load_numpy()
+        self.graph = graph
+        self.rng = self.np.random.default_rng(seed)
+        self.edge_weight = None
+        if weight != "uniform":
+            deg = graph.degrees().astype(self.np.float64)
+            w = deg[graph.indices]
+            self.edge_weight = w if weight == "degree" else 1.0 / self.np.maximum(w, 1.0)
+
+    def sample_neighbors(self, frontier, fanout: int):
+        """For each frontier node, up to `fanout` distinct neighbors; returns (src, dst) arrays."""
+        np = self.np
+        g = self.graph
+        starts = g.indptr[frontier]
+        deg = g.indptr[frontier + 1] - starts
+        total = int(deg.sum())
+        if total == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        # position of every candidate edge of the frontier in `indices`
+        seg = np.repeat(np.arange(len(frontier)), deg)
+        seg_start = np.repeat(np.cumsum(deg) - deg, deg)
+        edge_pos = np.repeat(starts, deg) + (np.arange(total) - seg_start)
+        u = self.rng.random(total)
+        if self.edge_weight is None:
+            keys = u
+        else:
+            # Efraimidis-Spirakis: largest u^(1/w) wins, i.e. smallest -log(u)/w
+            keys = -np.log(u) / np.maximum(self.edge_weight[edge_pos], 1e-12)
+        order = np.lexsort((keys, seg))
+        rank = np.arange(total) - seg_start
+        keep = order[rank < fanout]
+        return frontier[seg[keep]], g.indices[edge_pos[keep]]
+
+    def sample(self, seeds, fanouts: Sequence[int]) -> Dict[str, Any]:
+        """k-hop sample around `seeds` (node indices); one fanout per hop."""
+        np = self.np
+        seeds = np.unique(np.asarray(seeds, dtype=np.int64))
+        visited = seeds
+        frontier = seeds
+        src_parts: List[Any] = []
+        dst_parts: List[Any] = []
+        order_parts = [seeds]
+        hop_parts = [np.zeros(len(seeds), dtype=np.int64)]
+        for hop, fanout in enumerate(fanouts, 1):
+            src, dst = self.sample_neighbors(frontier, fanout)
+            src_parts.append(src)
+            dst_parts.append(dst)
+            new = np.setdiff1d(dst, visited)
+            if len(new) == 0:
+                break
+            order_parts.append(new)
+            hop_parts.append(np.full(len(new), hop, dtype=np.int64))
+            visited = np.union1d(visited, new)
+            frontier = new
+        return self.subgraph(np.concatenate(order_parts), np.concatenate(hop_parts), len(seeds),
+                             np.concatenate(src_parts) if src_parts else np.zeros(0, dtype=np.int64),
+                             np.concatenate(dst_parts) if dst_parts else np.zeros(0, dtype=np.int64))
+
+    def subgraph(self, node_index, hop, num_seeds: int, src, dst) -> Dict[str, Any]:
+        """Re-index sampled edges to 0..n-1 in the order of `node_index`."""
+        np = self.np
+        sorter = np.argsort(node_index)
+        local = lambda x: sorter[np.searchsorted(node_index, x, sorter=sorter)]
+        edge_index = np.stack([local(src), local(dst)]) if len(src) else np.zeros((2, 0), dtype=np.int64)
+        return {
+            "node_index": node_index,
+            "node_ids": self.graph.nodes[node_index],
+            "features": self.graph.features[node_index],
+            "edge_index": edge_index,
+            "hop": hop,
+            "num_seeds": num_seeds,
+        }
+
+    def batches(self, seeds, fanouts: Sequence[int], batch_size: int, shuffle: bool = True) -> Iterator[Dict[str, Any]]:
+        """Sample one subgraph per batch of seeds."""
+        np = self.np
+        seeds = np.asarray(seeds, dtype=np.int64)
+        if shuffle:
+            seeds = self.rng.permutation(seeds)
+        for start in range(0, len(seeds), batch_size):
+            yield self.sample(seeds[start:start + batch_size], fanouts)
+
+
+def pack_batches(batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Concatenate subgraphs into flat arrays with `node_ptr`/`edge_ptr` offsets."""
+    np = load_numpy()
+    node_counts = [len(b["node_index"]) for b in batches]
+    edge_counts = [b["edge_index"].shape[1] for b in batches]
+    return {
+        "node_ptr": np.concatenate([[0], np.cumsum(node_counts)]).astype(np.int64),
+        "edge_ptr": np.concatenate([[0], np.cumsum(edge_counts)]).astype(np.int64),
+        "num_seeds": np.asarray([b["num_seeds"] for b in batches], dtype=np.int64),
+        "node_index": np.concatenate([b["node_index"] for b in batches]),
+        "hop": np.concatenate([b["hop"] for b in batches]),
+        "features": np.concatenate([b["features"] for b in batches]),
+        "edge_index": np.concatenate([b["edge_index"] for b in batches], axis=1),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Sample k-hop subgraphs from a combined graph for GNN training")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--gnn", help="comb_graph_gnn.npz or its directory")
+    src.add_argument("--comb-graph", help="comb_graph.json or its directory (no dense adjacency is built)")
+    p.add_argument("--seed-type", action="append", default=[], choices=NODE_TYPES, help="Seed at all nodes of this type (repeatable)")
+    p.add_argument("--seed-ids", nargs="+", default=[], help="Seed at these node ids (e.g. dev:M0)")
+    p.add_argument("--fanouts", type=int, nargs="+", default=[10, 5], help="Neighbors kept per node at each hop (default: 10 5)")
+    p.add_argument("--weight", choices=WEIGHTINGS, default="uniform", help="Neighbor weighting (default: uniform)")
+    p.add_argument("--batch-size", type=int, default=0, help="Seeds per subgraph (default: all seeds in one)")
+    p.add_argument("--rng-seed", type=int, default=0, help="Random seed (default: 0)")
+    p.add_argument("--out", help="Write the sampled subgraphs to this .npz")
+    args = p.parse_args(argv)
+
+    if load_numpy() is None:
+        raise SystemExit("neighbor_sampler requires numpy")
+    if not (args.seed_type or args.seed_ids):
+        p.error("give --seed-type and/or --seed-ids")
+    np = load_numpy()
+
+    graph = CSRGraph.from_gnn_npz(args.gnn) if args.gnn else CSRGraph.from_comb_graph(args.comb_graph)
+    parts = []
+    if args.seed_type:
+        parts.append(graph.nodes_of_type(*args.seed_type))
+    if args.seed_ids:
+        parts.append(graph.node_index(args.seed_ids))
+    seeds = np.unique(np.concatenate(parts))
+
+    sampler = NeighborSampler(graph, weight=args.weight, seed=args.rng_seed)
+    batch_size = args.batch_size or len(seeds)
+    batches = list(sampler.batches(seeds, args.fanouts, batch_size, shuffle=bool(args.batch_size)))
+    for i, b in enumerate(batches):
+        print(json.dumps({"batch": i, "seeds": b["num_seeds"], "nodes": len(b["node_index"]),
+                          "edges": int(b["edge_index"].shape[1])}))
+    if args.out:
+        np.savez_compressed(args.out, **pack_batches(batches))
+        print(f"Wrote {len(batches)} subgraphs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
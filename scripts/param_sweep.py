@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Expand a parameterized netlist (e.g. `*_gpt.sp`) into many sized variants that
+share one topology.
+
+The structural graph, combined graph and GNN arrays are built once from the
+netlist and written as usual (`str_graph.json`, `comb_graph.json`,
+`comb_graph_gnn.npz`, `comb_graph_gnn_meta.json`). Each sweep point only adds
+numeric sizing features, stacked into `sweep_features.npz`:
+- `variant_features`: [num_variants, N, F_numeric] float32, rows aligned with `nodes`
+- `numeric_feature_names`: ["W", "L", "value"]
+  - device nodes: W/L of MOS devices, value of R/C/L elements
+  - parameter nodes `W_<dev>`/`L_<dev>` and `<dev>` (e.g. `R0`): value
+- `param_names`, `param_values`: [num_variants, P] swept `.param` values
+- `nodes`, `topology`: node ids and the shared topology file name
+
+`.param` and instance expressions (`{WN}`, `'WN*2'`, `10u`) are evaluated for
+all variants at once with NumPy.
+
+Usage:
+  # grid: explicit values, or start:stop:num (append :log for log spacing)
+  python scripts/param_sweep.py --netlist netlists/diff_amps/86/86_gpt.sp \
+      --fun-graph netlists/diff_amps/86/fun_updated.json \
+      --grid WN=1u:10u:20 --grid RL=10k:1meg:50:log --out-dir /tmp/86_sweep
+
+  # random samples: lo:hi ranges (append :log for log-uniform)
+  python scripts/param_sweep.py --netlist netlists/diff_amps/86/86_gpt.sp \
+      --random 5000 --range WN=1u:10u --range WP=2u:20u --seed 0
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from canonicalize_netlist import logical_lines
+from comb_graph_to_gnn import load_numpy, write_gnn_outputs
+from combine_graphs import build_combined_graph
+from graph_io import load_json, load_netlist_parser, write_json
+
+sg = load_netlist_parser()
+
+NUMERIC_FEATURES = ["W", "L", "value"]
+
+SPICE_SCALE = {
+    "t": 1e12, "g": 1e9, "meg": 1e6, "k": 1e3, "mil": 25.4e-6,
+    "m": 1e-3, "u": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15, "a": 1e-18,
+}
+# number with optional SPICE scale suffix and trailing unit letters (e.g. 10uF)
+NUMBER_RE = re.compile(r"(?<![\w.])(\d+\.?\d*|\.\d+)(e[+-]?\d+)?(meg|mil|[tgkmunpfa])?[a-z]*", re.I)
+ASSIGN_RE = re.compile(r"(\w+)\s*=\s*(\{[^}]*\}|'[^']*'|\S+)")
+
+# number literals parse as ast.Num before Python 3.8 (deprecated, later removed)
+LEGACY_NUM = ast.Num if sys.version_info < (3, 8) else None
+
+FUNCS = {"sqrt": "sqrt", "abs": "abs", "exp": "exp", "log": "log", "min": "minimum", "max": "maximum"}
+
+
+def parse_spice_number(tok: str) -> float:
+    m = NUMBER_RE.fullmatch(tok.strip())
+    if not m:
+        raise ValueError(f"Not a SPICE number: {tok!r}")
+    value = float(m.group(1) + (m.group(2) or ""))
+    return value * SPICE_SCALE.get((m.group(3) or "").lower(), 1.0)
+
+
+def _to_python_expr(expr: str) -> str:
+    expr = expr.strip()
+    if expr[:1] in "{'" and expr[-1:] in "}'":
+        expr = expr[1:-1]
+    return NUMBER_RE.sub(lambda m: repr(parse_spice_number(m.group(0))), expr)
+
+
+def eval_expr(expr: str, env: Dict[str, Any], np) -> Any:
+    """Evaluate a SPICE expression; names resolve case-insensitively in `env` (arrays broadcast)."""
+    tree = ast.parse(_to_python_expr(expr), mode="eval")
+
+    def ev(node):
+        if isinstance(node, ast.Expression):
+            return ev(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        if LEGACY_NUM is not None and isinstance(node, LEGACY_NUM) and isinstance(node.n, (int, float)):
+            return float(node.n)
+        if isinstance(node, ast.Name):
+            key = node.id.upper()
+            if key not in env:
+                raise KeyError(f"Undefined parameter {node.id!r}")
+            return env[key]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            v = ev(node.operand)
+            return -v if isinstance(node.op, ast.USub) else v
+        if isinstance(node, ast.BinOp):
+            a, b = ev(node.left), ev(node.right)
+            if isinstance(node.op, ast.Add):
+                return a + b
+            if isinstance(node.op, ast.Sub):
+                return a - b
+            if isinstance(node.op, ast.Mult):
+                return a * b
+            if isinstance(node.op, ast.Div):
+                return a / b
+            if isinstance(node.op, ast.Pow):
+                return a ** b
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id.lower() in FUNCS:
+            return getattr(np, FUNCS[node.func.id.lower()])(*[ev(a) for a in node.args])
+        raise ValueError(f"Unsupported expression: {expr!r}")
+
+    return ev(tree)
+
+
+def parse_params(netlist_text: str) -> Dict[str, str]:
+    """Ordered `.param` name (upper-case) -> expression string (`+` continuations included)."""
+    params: Dict[str, str] = {}
+    for line in logical_lines(netlist_text):
+        if not line.lower().startswith(".param"):
+            continue
+        line = sg.strip_inline_comment(line)[len(".param"):]
+        for name, expr in ASSIGN_RE.findall(line):
+            params[name.upper()] = expr
+    return params
+
+
+def parse_device_sizes(netlist_text: str) -> Dict[str, Dict[str, str]]:
+    """Device name -> {"W": expr, "L": expr} for MOS, {"value": expr} for R/C/L."""
+    sizes: Dict[str, Dict[str, str]] = {}
+    for line in logical_lines(netlist_text):
+        parsed = sg.parse_spice_element(line)
+        if parsed is None:
+            continue
+        name, _, dev_type, extras = parsed
+        letter = name[0].upper()
+        if sg.is_mos_device(name, dev_type):
+            inst = {k.upper(): v for k, v in ASSIGN_RE.findall(" ".join(extras))}
+            sizes[name] = {k: inst[k] for k in ("W", "L") if k in inst}
+        elif letter in "RCL" and extras:
+            sizes[name] = {"value": extras[0]}
+    return sizes
+
+
+def parse_axis(spec: str, np) -> Tuple[str, Any]:
+    """`NAME=v1,v2,...` or `NAME=start:stop:num[:log]` -> (NAME, values)."""
+    name, _, rhs = spec.partition("=")
+    if not rhs:
+        raise ValueError(f"Bad grid spec {spec!r}; expected NAME=values")
+    if ":" in rhs:
+        parts = rhs.split(":")
+        lo, hi, num = parse_spice_number(parts[0]), parse_spice_number(parts[1]), int(parts[2])
+        values = np.geomspace(lo, hi, num) if parts[3:] == ["log"] else np.linspace(lo, hi, num)
+    else:
+        values = np.asarray([parse_spice_number(v) for v in rhs.split(",")])
+    return name.upper(), values
+
+
+def grid_points(specs: List[str], np) -> Tuple[List[str], Any]:
+    """Cartesian product of grid axes -> (names, [V, P] values)."""
+    axes = [parse_axis(s, np) for s in specs]
+    names = [n for n, _ in axes]
+    mesh = np.meshgrid(*[v for _, v in axes], indexing="ij")
+    return names, np.stack([m.ravel() for m in mesh], axis=1)
+
+
+def random_points(specs: List[str], n: int, seed: Optional[int], np) -> Tuple[List[str], Any]:
+    """`n` uniform (or log-uniform with :log) samples within `NAME=lo:hi` ranges."""
+    rng = np.random.default_rng(seed)
+    names, cols = [], []
+    for spec in specs:
+        name, _, rhs = spec.partition("=")
+        parts = rhs.split(":")
+        lo, hi = parse_spice_number(parts[0]), parse_spice_number(parts[1])
+        if parts[2:] == ["log"]:
+            cols.append(np.exp(rng.uniform(np.log(lo), np.log(hi), n)))
+        else:
+            cols.append(rng.uniform(lo, hi, n))
+        names.append(name.upper())
+    return names, np.stack(cols, axis=1)
+
+
+def evaluate_variants(params: Dict[str, str], names: List[str], values: Any, np) -> Dict[str, Any]:
+    """Evaluate all `.param`s per variant; swept names take their sweep values."""
+    V = values.shape[0]
+    env: Dict[str, Any] = {}
+    swept = {n: values[:, i] for i, n in enumerate(names)}
+    unknown = set(swept) - set(params)
+    if unknown:
+        raise KeyError(f"Swept parameters not declared by .param: {sorted(unknown)}")
+    for name, expr in params.items():
+        if name in swept:
+            env[name] = swept[name]
+        else:
+            env[name] = np.broadcast_to(np.asarray(eval_expr(expr, env, np), dtype=np.float64), (V,))
+    return env
+
+
+def build_variant_features(nodes: List[Dict[str, Any]], sizes: Dict[str, Dict[str, str]],
+                           env: Dict[str, Any], num_variants: int, np) -> Any:
+    idx = {n["id"]: i for i, n in enumerate(nodes)}
+    col = {f: j for j, f in enumerate(NUMERIC_FEATURES)}
+    out = np.zeros((num_variants, len(nodes), len(NUMERIC_FEATURES)), dtype=np.float32)
+    for dev, exprs in sizes.items():
+        for key, expr in exprs.items():
+            v = np.broadcast_to(eval_expr(expr, env, np), (num_variants,))
+            dev_idx = idx.get(f"dev:{dev}")
+            if dev_idx is not None:
+                out[:, dev_idx, col[key]] = v
+            param_id = f"{key}_{dev}" if key in ("W", "L") else dev
+            if param_id in idx:
+                out[:, idx[param_id], col["value"]] = v
+    return out
+
+
+def run_sweep(netlist_text: str, fun_graph: Optional[Dict[str, Any]], names: List[str], values: Any,
+              out_dir: str) -> Dict[str, Any]:
+    """Build the shared topology once and write the stacked variant features."""
+    np = load_numpy()
+    os.makedirs(out_dir, exist_ok=True)
+
+    str_graph = sg.netlist_to_graph_json(netlist_text)
+    combined = build_combined_graph(str_graph, fun_graph or {})
+    write_json(str_graph, os.path.join(out_dir, "str_graph.json"))
+    write_json(combined, os.path.join(out_dir, "comb_graph.json"))
+    write_gnn_outputs(combined, out_dir)
+
+    env = evaluate_variants(parse_params(netlist_text), names, values, np)
+    nodes = combined["nodes"]
+    feats = build_variant_features(nodes, parse_device_sizes(netlist_text), env, values.shape[0], np)
+    out_path = os.path.join(out_dir, "sweep_features.npz")
+    np.savez_compressed(out_path,
+                        variant_features=feats,
+                        numeric_feature_names=np.array(NUMERIC_FEATURES),
+                        param_names=np.array(names),
+                        param_values=values,
+                        nodes=np.array([n["id"] for n in nodes], dtype=object),
+                        topology=np.array("comb_graph_gnn.npz"))
+    print(f"Wrote {values.shape[0]} variants to {out_path}")
+    return {"variant_features": feats, "param_names": names, "param_values": values}
+
+
+def load_sweep(out_dir: str) -> Dict[str, Any]:
+    """Load shared topology arrays plus the stacked variant features of a sweep."""
+    np = load_numpy()
+    with np.load(os.path.join(out_dir, "sweep_features.npz"), allow_pickle=True) as sweep:
+        out = {k: sweep[k] for k in sweep.files}
+    with np.load(os.path.join(out_dir, str(out["topology"])), allow_pickle=True) as topo:
+        for k in ("features", "adjacency"):
+            out[k] = topo[k]
+        if not np.array_equal(topo["nodes"], out["nodes"]):
+            raise ValueError("Sweep features are not aligned with the topology node order")
+    return out
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Sweep .param values over one shared topology")
+    p.add_argument("--netlist", required=True, help="Parameterized netlist (e.g. *_gpt.sp)")
+    p.add_argument("--fun-graph", dest="fun_graph", help="Transformed functional graph (fun_updated.json) to combine with")
+    p.add_argument("--grid", action="append", default=[], help="NAME=v1,v2,... or NAME=start:stop:num[:log] (repeatable)")
+    p.add_argument("--random", type=int, help="Number of random samples (uses --range)")
+    p.add_argument("--range", dest="ranges", action="append", default=[], help="NAME=lo:hi[:log] for --random (repeatable)")
+    p.add_argument("--seed", type=int, default=None, help="Random seed for --random")
+    p.add_argument("--out-dir", dest="out_dir", help="Output directory (defaults to <netlist dir>/sweep)")
+    args = p.parse_args(argv)
+
+    np = load_numpy()
+    if np is None:
+        raise SystemExit("param_sweep requires numpy")
+    if bool(args.grid) == bool(args.random):
+        p.error("give either --grid specs or --random N with --range specs")
+    if args.random:
+        if not args.ranges:
+            p.error("--random needs at least one --range")
+        names, values = random_points(args.ranges, args.random, args.seed, np)
+    else:
+        names, values = grid_points(args.grid, np)
+
+    with open(args.netlist, "r") as f:
+        netlist_text = f.read()
+    fun_graph = load_json(args.fun_graph) if args.fun_graph else None
+    out_dir = args.out_dir or os.path.join(os.path.dirname(args.netlist), "sweep")
+    run_sweep(netlist_text, fun_graph, names, values, out_dir)
+
+
+if __name__ == "__main__":
+    main()
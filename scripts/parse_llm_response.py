@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Turn raw LLM responses into `fun_graph.json` and `<circuit>_prune.json`.
+
+A response is scanned once, left to right: at every `{` or `[` a JSON value is
+decoded in place (and skipped as a whole), at every `(A, rel, B)` a tuple is
+read; anything else (prose, headings, code fences) is ignored. From what was
+found:
+- fun graph: nodes/links of JSON graph objects plus the tuples. Node types are
+  normalized (`substructure`/`sub structure` -> `sub-structure`, `x`/`param` ->
+  `parameter`, `metric` -> `performance`); nodes without a usable type get one
+  inferred from the relations they take part in. Relation labels are mapped
+  onto the labels the prompts allow (`validate_graphs.FUN_RELATIONS`); links
+  with an unknown label are dropped and counted, links without one are kept
+  as plain connections. The result is checked with the corpus validator.
+- prune list: JSON objects with a `component` key, keys normalized to
+  `component`, `reason`, `impact_estimate`.
+
+Usage:
+  python scripts/parse_llm_response.py --response reply.txt --circuit netlists/diff_amps/84/ --kind fun
+  python scripts/parse_llm_response.py --response reply.txt --circuit netlists/diff_amps/84/ --kind prune
+  python scripts/parse_llm_response.py --batch replies.jsonl --out-root netlists/diff_amps/
+  python scripts/parse_llm_response.py --batch replies.jsonl --out-root out/ --profile-jsonl timings.jsonl
+
+A batch file holds one JSON object per line with `circuit_id`, `response` and
+optionally `kind` (fun/prune, default: detected from the content); outputs go
+to `<out-root>/<circuit_id>/`. With `--net-map` (see canonicalize_netlist.py)
+short net names are restored first.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from graph_io import write_json
+from profiling import StageProfiler, add_profiling_args, graph_counts, profiler_from_args
+from validate_graphs import InternedCorpus, check_python
+
+# `{` / `[` start a JSON candidate; `( a , b , c )` on one line is a tuple candidate
+SCAN_RE = re.compile(r"[\{\[]|\(([^()\n]*,[^()\n]*,[^()\n]*)\)")
+STRIP_CHARS = " \t'\"`*"
+LINK_RELATION_KEYS = ("relation", "relationship", "label")
+
+TYPE_ALIASES = {
+    "performance": "performance", "metric": "performance", "performance-metric": "performance", "p": "performance",
+    "sub-structure": "sub-structure", "substructure": "sub-structure", "structure": "sub-structure", "s": "sub-structure",
+    "parameter": "parameter", "param": "parameter", "x": "parameter", "design-parameter": "parameter",
+}
+RELATION_ALIASES = {
+    "tradeoff": "trade-off", "trade-off": "trade-off",
+    "directly-proportional": "directly-proportional", "direct-proportional": "directly-proportional",
+    "directly": "directly-proportional", "proportional": "directly-proportional", "positive": "directly-proportional",
+    "inversely-proportional": "inversely-proportional", "inverse-proportional": "inversely-proportional",
+    "inversely": "inversely-proportional", "inverse": "inversely-proportional", "negative": "inversely-proportional",
+    "ambiguous": "ambiguous", "unclear": "ambiguous",
+    "influences": "influences", "influence": "influences", "affects": "influences",
+    "belongs-to": "belongs-to", "belongs": "belongs-to", "part-of": "belongs-to",
+}
+PRUNE_KEY_ALIASES = {
+    "component": "component", "device": "component", "name": "component",
+    "reason": "reason", "explanation": "reason", "rationale": "reason",
+    "impact-estimate": "impact_estimate", "impact": "impact_estimate",
+}
+
+
+def _label(s: Any) -> str:
+    return re.sub(r"[\s_]+", "-", str(s).strip(STRIP_CHARS).lower())
+
+
+def normalize_type(t: Any) -> Optional[str]:
+    return TYPE_ALIASES.get(_label(t)) if t is not None else None
+
+
+def normalize_relation(r: Any) -> Optional[str]:
+    return RELATION_ALIASES.get(_label(r)) if r is not None else None
+
+
+class ParsedResponse:
+    """Everything extracted from one response."""
+
+    def __init__(self):
+        self.tuples: List[Tuple[str, str, str]] = []
+        self.nodes: List[Dict[str, Any]] = []
+        self.links: List[Dict[str, Any]] = []
+        self.prune: List[Dict[str, Any]] = []
+        self.skipped: Counter = Counter()
+
+    def add_json(self, value: Any) -> None:
+        if isinstance(value, dict):
+            if "nodes" in value or "links" in value:
+                for v in (value.get("nodes") or [], value.get("links") or []):
+                    self.add_json(v)
+            elif "component" in value:
+                self.prune.append(value)
+            elif "source" in value and "target" in value:
+                self.links.append(value)
+            elif "id" in value:
+                self.nodes.append(value)
+            else:
+                # keyed sections, e.g. {"P-graph": [...], "PS-graph": [...]}
+                for v in value.values():
+                    if isinstance(v, (list, dict)):
+                        self.add_json(v)
+        elif isinstance(value, list):
+            for v in value:
+                if isinstance(v, (list, tuple)) and len(v) == 3 and all(isinstance(x, str) for x in v):
+                    self.tuples.append(tuple(v))
+                else:
+                    self.add_json(v)
+
+
+def scan_response(text: str) -> ParsedResponse:
+    """Extract JSON values and `(A, rel, B)` tuples from `text` in one pass."""
+    parsed = ParsedResponse()
+    decode = json.JSONDecoder().raw_decode
+    pos = 0
+    search = SCAN_RE.search
+    while True:
+        m = search(text, pos)
+        if m is None:
+            break
+        if m.group(1) is None:
+            try:
+                value, end = decode(text, m.start())
+            except ValueError:
+                pos = m.start() + 1
+                continue
+            parsed.add_json(value)
+            pos = end
+        else:
+            parts = [p.strip(STRIP_CHARS) for p in m.group(1).split(",")]
+            if len(parts) == 3 and all(parts):
+                parsed.tuples.append((parts[0], parts[1], parts[2]))
+            else:
+                parsed.skipped["tuple"] += 1
+            pos = m.end()
+    return parsed
+
+
+def infer_types(links: List[Tuple[str, str, str]], known: Dict[str, str]) -> Dict[str, str]:
+    """Node types implied by the relations (explicit types in `known` win)."""
+    types = dict(known)
+
+    def setdefault(node: str, t: str) -> None:
+        types.setdefault(node, t)
+
+    # unambiguous relations first, then directly-proportional (used in both P- and PSX-graphs)
+    for s, rel, t in links:
+        if rel in ("trade-off", "ambiguous"):
+            setdefault(s, "performance")
+            setdefault(t, "performance")
+        elif rel == "influences":
+            setdefault(s, "sub-structure")
+            setdefault(t, "performance")
+        elif rel == "belongs-to":
+            setdefault(s, "parameter")
+            setdefault(t, "sub-structure")
+        elif rel == "inversely-proportional":
+            setdefault(s, "parameter")
+            setdefault(t, "performance")
+    for s, rel, t in links:
+        if rel == "directly-proportional":
+            setdefault(t, "performance")
+    for s, rel, t in links:
+        if rel == "directly-proportional":
+            setdefault(s, "parameter")
+    return types
+
+
+def build_fun_graph(parsed: ParsedResponse) -> Tuple[Dict[str, Any], Counter]:
+    """Node-link fun graph (fun_graph.json layout) from a parsed response, plus drop counts."""
+    stats: Counter = Counter(parsed.skipped)
+    order: Dict[str, None] = {}
+    explicit: Dict[str, str] = {}
+    for n in parsed.nodes:
+        nid = str(n.get("id", "")).strip(STRIP_CHARS)
+        if not nid:
+            stats["node"] += 1
+            continue
+        order.setdefault(nid)
+        t = normalize_type(n.get("type"))
+        if t is not None:
+            explicit.setdefault(nid, t)
+
+    raw = [(l.get("source"), next((l[k] for k in LINK_RELATION_KEYS if k in l), None), l.get("target"))
+           for l in parsed.links] + parsed.tuples
+    links: List[Tuple[str, Optional[str], str]] = []
+    seen = set()
+    for s, r, t in raw:
+        # links without any relation are plain connections and kept as such
+        rel = normalize_relation(r)
+        if (r is not None and rel is None) or s is None or t is None:
+            stats["relation"] += 1
+            continue
+        s, t = str(s).strip(STRIP_CHARS), str(t).strip(STRIP_CHARS)
+        if (s, rel, t) in seen:
+            continue
+        seen.add((s, rel, t))
+        links.append((s, rel, t))
+        order.setdefault(s)
+        order.setdefault(t)
+
+    types = infer_types(links, explicit)
+    nodes = [{"id": nid, "type": types[nid]} for nid in order if nid in types]
+    stats["untyped_node"] += len(order) - len(nodes)
+    kept = {n["id"] for n in nodes}
+    graph_links = [{"source": s, "target": t, "relation": r} if r else {"source": s, "target": t}
+                   for s, r, t in links if s in kept and t in kept]
+    return {"nodes": nodes, "links": graph_links}, +stats
+
+
+def build_prune(parsed: ParsedResponse) -> List[Dict[str, Any]]:
+    items = []
+    for item in parsed.prune:
+        out = {}
+        for k, v in item.items():
+            key = PRUNE_KEY_ALIASES.get(_label(k))
+            if key is not None and key not in out:
+                out[key] = v
+        if out.get("component"):
+            items.append(out)
+    return items
+
+
+def validate_graph(graph: Dict[str, Any], label: str) -> Dict[str, Any]:
+    corpus = InternedCorpus()
+    corpus.add_graph(label, graph)
+    return check_python(corpus).get(label, {})
+
+
+def detect_kind(parsed: ParsedResponse) -> str:
+    if parsed.prune and not (parsed.tuples or parsed.links):
+        return "prune"
+    return "fun"
+
+
+def process_response(text: str, kind: str, out_dir: str, circuit_id: str,
+                     net_map: Optional[Dict[str, str]] = None,
+                     profiler: Optional[StageProfiler] = None) -> Dict[str, Any]:
+    """Parse one response and write its artifact into `out_dir`; returns a summary."""
+    profiler = profiler or StageProfiler()
+    with profiler.stage("scan_response", chars=len(text)):
+        parsed = scan_response(text)
+    if kind == "auto":
+        kind = detect_kind(parsed)
+    os.makedirs(out_dir, exist_ok=True)
+    if kind == "prune":
+        with profiler.stage("build_prune") as rec:
+            result: Any = build_prune(parsed)
+            rec["items"] = len(result)
+        summary: Dict[str, Any] = {"items": len(result)}
+        out_path = os.path.join(out_dir, f"{circuit_id}_prune.json")
+    else:
+        with profiler.stage("build_fun_graph") as rec:
+            result, dropped = build_fun_graph(parsed)
+            rec.update(graph_counts(result))
+        summary = {"nodes": len(result["nodes"]), "links": len(result["links"])}
+        if dropped:
+            summary["dropped"] = dict(dropped)
+        out_path = os.path.join(out_dir, "fun_graph.json")
+    if net_map:
+        from canonicalize_netlist import restore_json
+        result = restore_json(result, net_map)
+    if kind == "fun":
+        with profiler.stage("validate_fun_graph"):
+            issues = validate_graph(result, out_path)
+        if issues:
+            summary["issues"] = {k: v["count"] for k, v in issues.items()}
+    with profiler.stage("write_response_output"):
+        write_json(result, out_path)
+    summary.update({"circuit_id": circuit_id, "kind": kind, "out": out_path})
+    return summary
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Parse raw LLM responses into fun_graph.json / <id>_prune.json")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--response", help="File with one raw LLM response ('-' for stdin)")
+    group.add_argument("--batch", help="JSONL file of {circuit_id, response[, kind]} objects")
+    p.add_argument("--kind", choices=("auto", "fun", "prune"), default="auto",
+                   help="Artifact to build (default: detected from the response)")
+    p.add_argument("--circuit", help="Circuit directory to write into (with --response; its name is the circuit id)")
+    p.add_argument("--out-root", default=".", help="With --batch, write into <out-root>/<circuit_id>/ (default: .)")
+    p.add_argument("--net-map", help="Reverse net map from canonicalize_netlist.py to restore net names")
+    add_profiling_args(p)
+    args = p.parse_args(argv)
+    profiler = profiler_from_args(args)
+
+    net_map = None
+    if args.net_map:
+        with open(args.net_map, "r") as f:
+            net_map = json.load(f)
+
+    if args.response:
+        circuit = args.circuit or "."
+        circuit_id = os.path.basename(os.path.normpath(os.path.abspath(circuit)))
+        if args.response == "-":
+            text = sys.stdin.read()
+        else:
+            with open(args.response, "r") as f:
+                text = f.read()
+        profiler.circuit = circuit_id
+        summaries = [process_response(text, args.kind, circuit, circuit_id, net_map, profiler)]
+    else:
+        summaries = []
+        with open(args.batch, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                cid = str(rec["circuit_id"])
+                profiler.circuit = cid
+                summaries.append(process_response(rec["response"], rec.get("kind", args.kind),
+                                                  os.path.join(args.out_root, cid), cid, net_map, profiler))
+
+    for s in summaries:
+        print(json.dumps(s))
+    n_issues = sum(1 for s in summaries if s.get("issues"))
+    print(f"Parsed {len(summaries)} responses ({n_issues} with validation issues)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
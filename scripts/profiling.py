@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Per-stage instrumentation for the graph pipeline.
+
+A `StageProfiler` times named stages and writes one JSON object per stage
+(JSON lines) so corpus runs can be aggregated afterwards. Each record holds:
+- `stage`, `circuit`: stage name and circuit label (input path by default)
+- `wall_s`, `cpu_s`: wall-clock and process CPU time of the stage
+- `peak_rss_kb`: process peak resident set size after the stage (Unix only)
+- `alloc_kb`, `alloc_peak_kb`: tracemalloc current/peak deltas (with --profile-tracemalloc;
+  before Python 3.9 the peak cannot be reset, so it covers everything since tracing started)
+- `nodes`, `edges`: graph size, when the stage reports it
+- `cprofile`: path of the cProfile dump (with --profile-cprofile)
+
+When profiling is not enabled the profiler is a no-op, so entry points can
+always wrap their stages.
+
+Usage from an entry point:
+  python scripts/combine_graphs.py ... --profile-jsonl timings.jsonl --profile-tracemalloc
+
+Aggregating a run:
+  python scripts/profiling.py --summarize timings.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KiB, or None if unknown."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    if sys.platform == "darwin":
+        rss //= 1024
+    return int(rss)
+
+
+def graph_counts(graph: Dict[str, Any]) -> Dict[str, int]:
+    """Return node/edge counts of a node-link graph dict."""
+    return {"nodes": len(graph.get("nodes", [])), "edges": len(graph.get("links", []))}
+
+
+class StageProfiler:
+    """Collect per-stage timing/memory records and emit them as JSON lines.
+
+    `out_path` of None disables the profiler; "-" writes records to stderr.
+    """
+
+    def __init__(self,
+                 out_path: Optional[str] = None,
+                 trace_memory: bool = False,
+                 cprofile_dir: Optional[str] = None,
+                 circuit: Optional[str] = None):
+        self.enabled = out_path is not None or cprofile_dir is not None
+        self.out_path = out_path
+        self.trace_memory = trace_memory and self.enabled
+        self.cprofile_dir = cprofile_dir
+        self.circuit = circuit
+        self.records: List[Dict[str, Any]] = []
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        if cprofile_dir:
+            os.makedirs(cprofile_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block as stage `name`.
+
+        Yields the record dict; callers may add fields (e.g. `nodes`, `edges`)
+        before the block exits.
+        """
+        record: Dict[str, Any] = {"stage": name}
+        if self.circuit is not None:
+            record["circuit"] = self.circuit
+        record.update(fields)
+        if not self.enabled:
+            yield record
+            return
+
+        prof = None
+        if self.cprofile_dir:
+            import cProfile
+            prof = cProfile.Profile()
+        if self.trace_memory:
+            import tracemalloc
+            if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+            mem_before = tracemalloc.get_traced_memory()[0]
+
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield record
+        finally:
+            if prof is not None:
+                prof.disable()
+            record["wall_s"] = round(time.perf_counter() - wall0, 6)
+            record["cpu_s"] = round(time.process_time() - cpu0, 6)
+            record["peak_rss_kb"] = peak_rss_kb()
+            if self.trace_memory:
+                import tracemalloc
+                cur, peak = tracemalloc.get_traced_memory()
+                record["alloc_kb"] = round((cur - mem_before) / 1024.0, 1)
+                record["alloc_peak_kb"] = round((peak - mem_before) / 1024.0, 1)
+            if prof is not None:
+                label = os.path.basename(os.path.normpath(self.circuit or "run"))
+                dump = os.path.join(self.cprofile_dir, f"{label}.{name}.{len(self.records)}.prof")
+                prof.dump_stats(dump)
+                record["cprofile"] = dump
+            self._emit(record)
+
+    def _emit(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+        if self.out_path is None:
+            return
+        line = json.dumps(record, sort_keys=True)
+        if self.out_path == "-":
+            print(line, file=sys.stderr)
+        else:
+            # append so several entry points can share one file across a corpus run
+            with open(self.out_path, "a") as f:
+                f.write(line + "\n")
+
+
+def add_profiling_args(parser: argparse.ArgumentParser) -> None:
+    """Register the shared profiling options on an entry-point parser."""
+    g = parser.add_argument_group("profiling")
+    g.add_argument("--profile-jsonl", dest="profile_jsonl", default=None,
+                   help="Append per-stage timing/memory records to this JSON-lines file ('-' for stderr)")
+    g.add_argument("--profile-tracemalloc", dest="profile_tracemalloc", action="store_true",
+                   help="Also record tracemalloc allocation deltas per stage (slower)")
+    g.add_argument("--profile-cprofile", dest="profile_cprofile", default=None,
+                   help="Directory to write one cProfile dump per stage")
+
+
+def profiler_from_args(args: argparse.Namespace, circuit: Optional[str] = None) -> StageProfiler:
+    return StageProfiler(
+        out_path=getattr(args, "profile_jsonl", None),
+        trace_memory=getattr(args, "profile_tracemalloc", False),
+        cprofile_dir=getattr(args, "profile_cprofile", None),
+        circuit=circuit,
+    )
+
+
+def summarize(paths: List[str]) -> List[Dict[str, Any]]:
+    """Aggregate JSON-lines records per stage (count, total/max wall and CPU time)."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                r = json.loads(line)
+                s = stats.setdefault(r["stage"], {"stage": r["stage"], "count": 0, "wall_s": 0.0,
+                                                  "cpu_s": 0.0, "max_wall_s": 0.0, "slowest": None})
+                s["count"] += 1
+                s["wall_s"] += r.get("wall_s", 0.0)
+                s["cpu_s"] += r.get("cpu_s", 0.0)
+                if r.get("wall_s", 0.0) >= s["max_wall_s"]:
+                    s["max_wall_s"] = r.get("wall_s", 0.0)
+                    s["slowest"] = r.get("circuit")
+    for s in stats.values():
+        s["wall_s"] = round(s["wall_s"], 6)
+        s["cpu_s"] = round(s["cpu_s"], 6)
+    return sorted(stats.values(), key=lambda s: s["wall_s"], reverse=True)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Summarize per-stage profiling JSON lines")
+    p.add_argument("--summarize", nargs="+", required=True, help="JSON-lines files written via --profile-jsonl")
+    args = p.parse_args(argv)
+    for s in summarize(args.summarize):
+        print(json.dumps(s))
+
+
+if __name__ == "__main__":
+    main()
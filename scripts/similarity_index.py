@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Nearest-neighbor index over structural graphs, for finding similar or
+duplicate circuits.
+
+Each `str_graph.json` is reduced to a fixed-length signature:
+- Weisfeiler-Lehman subtree labels: nodes start from their device type,
+  terminal role or net kind (supply/ground/net) and are relabeled from their
+  sorted neighbor labels for `iterations` rounds; every label of every round
+  is counted
+- motif counts: device types, diode-connected devices and, per net, pairs of
+  (device type, terminal role) meeting there (e.g. the shared source of a
+  differential pair)
+
+Labels are feature-hashed into `dim` buckets, damped with log1p and
+L2-normalized, so signatures are rows of one float32 matrix and top-k cosine
+similarity is a single matrix-vector product plus `argpartition`.
+
+Usage:
+  python scripts/similarity_index.py --index circuits.npz --add netlists/diff_amps/
+  python scripts/similarity_index.py --index circuits.npz --add corpus_packed.npz
+  python scripts/similarity_index.py --index circuits.npz --query netlists/diff_amps/84/ --k 3
+  python scripts/similarity_index.py --index circuits.npz --duplicates 0.999
+
+`--add` accepts circuit directories (scanned recursively for str_graph.json),
+str_graph.json files, netlist files and packed datasets from ingest_corpus.py;
+the index file is created if missing and extended otherwise (`.npz` is
+appended to the index path when missing, as NumPy does on save).
+"""
+import argparse
+import os
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from comb_graph_to_gnn import load_numpy
+from graph_io import NETLIST_PATTERNS, find_netlist_in_dir, load_json, load_netlist_parser
+from graph_query import GraphIndex
+
+DEFAULT_DIM = 256
+DEFAULT_ITERATIONS = 2
+
+SUPPLY_NETS = ("VDD", "VCC", "AVDD", "DVDD")
+GROUND_NETS = ("VSS", "GND", "0", "AVSS", "DVSS")
+
+NETLIST_SUFFIXES = tuple(p[1:] for p in NETLIST_PATTERNS)
+
+
+def index_path(path: str) -> str:
+    """The file an index at `path` is stored in (`np.savez` appends `.npz`)."""
+    return path if path.endswith(".npz") else path + ".npz"
+
+
+def _bucket(label: str, dim: int) -> int:
+    # crc32 rather than hash(): signatures must not depend on PYTHONHASHSEED
+    return zlib.crc32(label.encode()) % dim
+
+
+def net_kind(net_id: str) -> str:
+    name = net_id.split(":", 1)[-1].upper()
+    if name in SUPPLY_NETS:
+        return "supply"
+    if name in GROUND_NETS:
+        return "ground"
+    return "net"
+
+
+def initial_labels(graph: Dict[str, Any]) -> Dict[str, str]:
+    labels = {}
+    for n in graph.get("nodes", []):
+        ntype = n.get("type")
+        if ntype == "device":
+            labels[n["id"]] = f"dev:{n.get('device_type')}"
+        elif ntype == "terminal":
+            labels[n["id"]] = f"term:{n.get('role')}"
+        elif ntype == "net":
+            labels[n["id"]] = net_kind(n["id"])
+        else:
+            labels[n["id"]] = str(ntype)
+    return labels
+
+
+def signature_counts(graph: Dict[str, Any], iterations: int = DEFAULT_ITERATIONS) -> Counter:
+    """Raw (unhashed) WL-label and motif counts of a structural graph."""
+    counts: Counter = Counter()
+    index = GraphIndex(graph)
+    labels = initial_labels(graph)
+    counts.update(f"wl0:{l}" for l in labels.values())
+    for it in range(1, iterations + 1):
+        labels = {
+            n: format(zlib.crc32(f"{l}|{','.join(sorted(labels[m] for m in index.neighbors.get(n, ())))}".encode()), "x")
+            for n, l in labels.items()
+        }
+        counts.update(f"wl{it}:{l}" for l in labels.values())
+
+    dev_type = {n["id"]: n.get("device_type") for n in graph.get("nodes", []) if n.get("type") == "device"}
+    counts.update(f"dev:{t}" for t in dev_type.values())
+    for dev, pins in index.device_nets.items():
+        nets = dict(pins)
+        if nets.get("G") is not None and nets.get("G") == nets.get("D"):
+            counts[f"diode:{dev_type.get(dev)}"] += 1
+    for net, incident in index.net_devices.items():
+        ends = sorted(f"{dev_type.get(d)}.{r}" for d, r in incident)
+        for i in range(len(ends)):
+            for j in range(i + 1, len(ends)):
+                counts[f"pair:{net_kind(net)}:{ends[i]}-{ends[j]}"] += 1
+    return counts
+
+
+def graph_signature(graph: Dict[str, Any], dim: int = DEFAULT_DIM, iterations: int = DEFAULT_ITERATIONS):
+    """L2-normalized float32 signature vector of a structural graph."""
+    np = load_numpy()
+    vec = np.zeros(dim, dtype=np.float32)
+    for label, c in signature_counts(graph, iterations).items():
+        vec[_bucket(label, dim)] += c
+    np.log1p(vec, out=vec)
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+class SimilarityIndex:
+    """Growable matrix of graph signatures with vectorized top-k cosine queries."""
+
+    def __init__(self, dim: int = DEFAULT_DIM, iterations: int = DEFAULT_ITERATIONS):
+        self.np = load_numpy()
+        self.dim = dim
+        self.iterations = iterations
+        self.ids: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._sig = self.np.zeros((0, dim), dtype=self.np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def signatures(self):
+        return self._sig[: len(self.ids)]
+
+    def _reserve(self, extra: int) -> None:
+        need = len(self.ids) + extra
+        if need > len(self._sig):
+            grown = self.np.zeros((max(need, 2 * len(self._sig), 64), self.dim), dtype=self.np.float32)
+            grown[: len(self.ids)] = self.signatures
+            self._sig = grown
+
+    def signature(self, graph: Dict[str, Any]):
+        return graph_signature(graph, self.dim, self.iterations)
+
+    def add(self, circuit_id: str, graph: Dict[str, Any]) -> None:
+        self.add_signature(circuit_id, self.signature(graph))
+
+    def add_signature(self, circuit_id: str, sig) -> None:
+        self._reserve(1)
+        self._sig[len(self.ids)] = sig
+        self._pos.setdefault(circuit_id, len(self.ids))
+        self.ids.append(circuit_id)
+
+    def query(self, sig, k: int = 5, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity) for one signature, best first."""
+        return self.query_many(sig[None, :], k, [exclude])[0]
+
+    def query_many(self, sigs, k: int = 5, exclude: Optional[List[Optional[str]]] = None) -> List[List[Tuple[str, float]]]:
+        """Top-k for each row of `sigs`, computed as one matrix product."""
+        np = self.np
+        n = len(self.ids)
+        if n == 0:
+            return [[] for _ in range(len(sigs))]
+        scores = np.asarray(sigs, dtype=np.float32) @ self.signatures.T
+        for row, cid in enumerate(exclude or ()):
+            if cid is not None and cid in self._pos:
+                scores[row, self._pos[cid]] = -np.inf
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(self.ids[j], float(s)) for j, s in zip(r_idx.tolist(), r_scores.tolist()) if s > -np.inf]
+            for r_idx, r_scores in zip(top, top_scores)
+        ]
+
+    def duplicates(self, threshold: float = 0.999, block: int = 1024) -> List[Tuple[str, str, float]]:
+        """All pairs with similarity >= threshold, scanning the Gram matrix block by block."""
+        np = self.np
+        sig = self.signatures
+        pairs = []
+        for start in range(0, len(sig), block):
+            scores = sig[start:start + block] @ sig.T
+            rows, cols = np.nonzero(scores >= threshold)
+            keep = cols > rows + start
+            for r, c in zip(rows[keep].tolist(), cols[keep].tolist()):
+                pairs.append((self.ids[start + r], self.ids[c], float(scores[r, c])))
+        return pairs
+
+    def save(self, path: str) -> None:
+        self.np.savez(index_path(path), ids=self.np.array(self.ids, dtype=str), signatures=self.signatures,
+                      dim=self.dim, iterations=self.iterations)
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        np = load_numpy()
+        with np.load(index_path(path)) as data:
+            index = cls(int(data["dim"]), int(data["iterations"]))
+            index.ids = data["ids"].tolist()
+            index._pos = {cid: i for i, cid in reversed(list(enumerate(index.ids)))}
+            index._sig = data["signatures"].astype(np.float32)
+        return index
+
+
+def iter_graphs(paths: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (circuit id, structural graph) from directories, graph/netlist files or packed datasets."""
+    sg = None
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, fnames in sorted(os.walk(p)):
+                if "str_graph.json" in fnames:
+                    yield os.path.normpath(root), load_json(os.path.join(root, "str_graph.json"))
+        elif p.endswith(".npz"):
+            from ingest_corpus import PackedCorpus
+            corpus = PackedCorpus(p)
+            for i, cid in enumerate(corpus.circuit_ids.tolist()):
+                yield cid, corpus.graph(i)
+        elif p.endswith(".json"):
+            yield os.path.normpath(os.path.dirname(p) or "."), load_json(p)
+        elif p.lower().endswith(NETLIST_SUFFIXES):
+            sg = sg or load_netlist_parser()
+            with open(p, "r") as f:
+                yield os.path.normpath(p), sg.netlist_to_graph_json(f.read())
+        else:
+            raise SystemExit(f"Don't know how to read a graph from {p}")
+
+
+def query_graph(path: str) -> Tuple[str, Dict[str, Any]]:
+    """Load the graph to query from a circuit directory, str_graph.json or netlist file."""
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, "str_graph.json")):
+            return os.path.normpath(path), load_json(os.path.join(path, "str_graph.json"))
+        netlist = find_netlist_in_dir(path)
+        if not netlist:
+            raise SystemExit(f"No str_graph.json or netlist found in {path}")
+        path = netlist
+    return next(iter_graphs([path]))
+
+
+def similar_fun_graphs(index_path: str, graph: Dict[str, Any], k: int,
+                       exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+    """Top-k indexed circuit directories that hold a fun_graph.json, for few-shot prompts."""
+    index = SimilarityIndex.load(index_path)
+    hits = index.query(index.signature(graph), k=len(index))
+    # ids are paths as given to --add; compare real paths so relative/absolute spellings match
+    skip = os.path.realpath(exclude) if exclude else None
+    found = [(cid, s) for cid, s in hits
+             if os.path.realpath(cid) != skip and os.path.exists(os.path.join(cid, "fun_graph.json"))]
+    return found[:k]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Build and query a structural similarity index over circuits")
+    p.add_argument("--index", required=True, help="Index .npz file (created by --add if missing)")
+    p.add_argument("--add", nargs="+", metavar="PATH", help="Circuit dirs, str_graph.json/netlist files or packed .npz to add")
+    p.add_argument("--query", metavar="PATH", help="Circuit dir, str_graph.json or netlist file to look up")
+    p.add_argument("--k", type=int, default=5, help="Number of neighbors to return (default: 5)")
+    p.add_argument("--duplicates", type=float, metavar="THRESHOLD", help="List indexed pairs with similarity >= THRESHOLD")
+    p.add_argument("--dim", type=int, default=DEFAULT_DIM, help=f"Signature length for a new index (default: {DEFAULT_DIM})")
+    p.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS,
+                   help=f"WL iterations for a new index (default: {DEFAULT_ITERATIONS})")
+    args = p.parse_args(argv)
+
+    if load_numpy() is None:
+        raise SystemExit("similarity_index requires numpy")
+    if not (args.add or args.query or args.duplicates is not None):
+        p.error("nothing to do: give --add, --query and/or --duplicates")
+
+    args.index = index_path(args.index)
+    if os.path.exists(args.index):
+        index = SimilarityIndex.load(args.index)
+    elif args.add:
+        index = SimilarityIndex(args.dim, args.iterations)
+    else:
+        raise SystemExit(f"Index not found: {args.index}")
+
+    if args.add:
+        known = set(index.ids)
+        added = 0
+        for cid, graph in iter_graphs(args.add):
+            if cid in known:
+                continue
+            index.add(cid, graph)
+            known.add(cid)
+            added += 1
+        index.save(args.index)
+        print(f"Added {added} circuits; index {args.index} holds {len(index)}")
+
+    if args.query:
+        cid, graph = query_graph(args.query)
+        for hit, score in index.query(index.signature(graph), k=args.k, exclude=cid):
+            print(f"{score:.4f}  {hit}")
+
+    if args.duplicates is not None:
+        pairs = index.duplicates(args.duplicates)
+        for a, b, score in pairs:
+            print(f"{score:.4f}  {a}  {b}")
+        print(f"{len(pairs)} pairs with similarity >= {args.duplicates}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,19 +14,11 @@ Usage:
 If `--out` is a directory, writes `fun_updated.json` inside it.
 """
 import argparse
-import json
 import os
 from typing import Dict, List, Any, Set, Tuple
 
-
-def load_json(path: str) -> Dict[str, Any]:
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-def write_json(obj: Dict[str, Any], path: str) -> None:
-    with open(path, "w") as f:
-        json.dump(obj, f, indent=2)
+from graph_io import load_json, write_json
+from profiling import add_profiling_args, graph_counts, profiler_from_args
 
 
 def build_node_index(nodes: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
@@ -104,24 +96,8 @@ def transform_links(links: List[Dict[str, Any]], node_index: Dict[str, Dict[str,
     return out
 
 
-def main():
-    p = argparse.ArgumentParser(description="Transform fun_graph.json into collapsed connects graph with variant nodes")
-    p.add_argument("--in", dest="in_path", required=True, help="Path to fun_graph.json")
-    p.add_argument("--out", dest="out_path", required=False, help="Output path (file or directory)")
-    args = p.parse_args()
-
-    in_path = args.in_path
-    out_path = args.out_path or None
-    if os.path.isdir(in_path):
-        in_path = os.path.join(in_path, "fun_graph.json")
-    if not os.path.exists(in_path):
-        raise FileNotFoundError(f"Input fun_graph not found: {in_path}")
-    if out_path is None:
-        out_path = os.path.join(os.path.dirname(in_path), "fun_updated.json")
-    elif os.path.isdir(out_path):
-        out_path = os.path.join(out_path, "fun_updated.json")
-
-    data = load_json(in_path)
+def transform_fun_graph(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand variant nodes and collapse relation-typed links of a fun graph dict."""
     orig_nodes = data.get("nodes", [])
     orig_links = data.get("links", [])
 
@@ -157,8 +133,35 @@ def main():
                     new_links.append({"source": nid, "target": tgt, "relation": "connects"})
                     seen.add((nid, tgt))
 
-    out = {"nodes": new_nodes, "links": new_links}
-    write_json(out, out_path)
+    return {"nodes": new_nodes, "links": new_links}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Transform fun_graph.json into collapsed connects graph with variant nodes")
+    p.add_argument("--in", dest="in_path", required=True, help="Path to fun_graph.json")
+    p.add_argument("--out", dest="out_path", required=False, help="Output path (file or directory)")
+    add_profiling_args(p)
+    args = p.parse_args(argv)
+
+    in_path = args.in_path
+    out_path = args.out_path or None
+    if os.path.isdir(in_path):
+        in_path = os.path.join(in_path, "fun_graph.json")
+    if not os.path.exists(in_path):
+        raise FileNotFoundError(f"Input fun_graph not found: {in_path}")
+    if out_path is None:
+        out_path = os.path.join(os.path.dirname(in_path), "fun_updated.json")
+    elif os.path.isdir(out_path):
+        out_path = os.path.join(out_path, "fun_updated.json")
+
+    profiler = profiler_from_args(args, circuit=os.path.dirname(in_path))
+    with profiler.stage("load_fun_graph"):
+        data = load_json(in_path)
+    with profiler.stage("transform_fun_graph") as rec:
+        out = transform_fun_graph(data)
+        rec.update(graph_counts(out))
+    with profiler.stage("write_fun_updated"):
+        write_json(out, out_path)
     print(f"Wrote transformed fun graph to {out_path}")
 
 
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Validate node-link graph JSON files (str/fun/comb graphs) across a whole corpus.
+
+Checks, per graph file:
+- `unknown_type`: node type outside the NODE_TYPES used for GNN features
+  (e.g. `substructure` instead of `sub-structure`)
+- `duplicate_id`: node id listed more than once
+- `dangling_link`: link endpoint that is not a node of the graph (these links
+  are silently dropped by `comb_graph_to_gnn.build_adjacency`)
+- `orphan_param`: `W_`/`L_` parameter node with no incident link, or, in graphs
+  that contain device nodes, whose device (`dev:<name>`) does not exist
+- `bad_relation`: link relation label outside the allowed set
+
+All graphs are loaded first and every node id, type and relation label is
+interned to an integer; the checks then run as one vectorized NumPy pass over
+the whole corpus. Without NumPy a plain-Python fallback gives the same result.
+
+Usage:
+  python scripts/validate_graphs.py netlists/diff_amps/
+  python scripts/validate_graphs.py netlists/diff_amps/75/fun_graph.json --report report.json
+
+Exits with status 1 if any issue is found.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from comb_graph_to_gnn import NODE_TYPES, load_numpy
+from graph_io import load_json
+
+GRAPH_FILENAMES = ("str_graph.json", "fun_graph.json", "fun_updated.json", "comb_graph.json")
+
+# relation labels produced by the LLM prompts plus the collapsed "connects" label
+FUN_RELATIONS = ("trade-off", "directly-proportional", "inversely-proportional", "ambiguous",
+                 "influences", "belongs-to")
+ALLOWED_RELATIONS = FUN_RELATIONS + ("connects",)
+
+# suffixes of parameter variant nodes added by transform_fun_graph
+PARAM_VARIANT_SUFFIXES = ("-directly-proportional", "-inversely-proportional")
+
+CHECKS = ("unknown_type", "duplicate_id", "dangling_link", "orphan_param", "bad_relation")
+
+# max example values kept per (file, check) in the report
+MAX_EXAMPLES = 5
+
+
+def collect_graph_files(paths: List[str], names=GRAPH_FILENAMES) -> List[str]:
+    """Expand directories (recursively) into the graph JSON files they contain."""
+    files: List[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, fnames in os.walk(p):
+                for fn in sorted(fnames):
+                    if fn in names:
+                        files.append(os.path.join(root, fn))
+        else:
+            files.append(p)
+    return sorted(files)
+
+
+def param_device(param_id: str) -> Optional[str]:
+    """`W_M0` / `W_M0-directly-proportional` -> `dev:M0`; None for other parameters."""
+    if not param_id.startswith(("W_", "L_")):
+        return None
+    base = param_id[2:]
+    for suf in PARAM_VARIANT_SUFFIXES:
+        if base.endswith(suf):
+            base = base[: -len(suf)]
+            break
+    return f"dev:{base}"
+
+
+class InternedCorpus:
+    """Flat integer arrays (as lists) describing all nodes and links of a corpus."""
+
+    def __init__(self):
+        self.strings: Dict[Any, int] = {}
+        self.table: List[Any] = []
+        self.files: List[str] = []
+        self.node_graph: List[int] = []
+        self.node_id: List[int] = []
+        self.node_type: List[int] = []
+        self.link_graph: List[int] = []
+        self.link_src: List[int] = []
+        self.link_dst: List[int] = []
+        self.link_rel: List[int] = []
+
+    def intern(self, s: Any) -> int:
+        code = self.strings.get(s)
+        if code is None:
+            code = len(self.table)
+            self.strings[s] = code
+            self.table.append(s)
+        return code
+
+    def add_graph(self, path: str, graph: Dict[str, Any]) -> None:
+        g = len(self.files)
+        self.files.append(path)
+        intern = self.intern
+        for n in graph.get("nodes", []):
+            self.node_graph.append(g)
+            self.node_id.append(intern(n.get("id")))
+            self.node_type.append(intern(n.get("type")))
+        for l in graph.get("links", []):
+            self.link_graph.append(g)
+            self.link_src.append(intern(l.get("source")))
+            self.link_dst.append(intern(l.get("target")))
+            self.link_rel.append(intern(l.get("relation")))
+
+
+def _add_issue(report: Dict[str, Dict[str, Any]], path: str, check: str, example: Any) -> None:
+    entry = report[path].setdefault(check, {"count": 0, "examples": []})
+    entry["count"] += 1
+    if len(entry["examples"]) < MAX_EXAMPLES:
+        entry["examples"].append(example)
+
+
+def _sorted_unique(np, a):
+    a = np.sort(a)
+    if len(a) == 0:
+        return a
+    return a[np.concatenate(([True], a[1:] != a[:-1]))]
+
+
+def check_vectorized(c: InternedCorpus, np) -> Dict[str, Dict[str, Any]]:
+    report: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    # device node each W_/L_ parameter string refers to (interned before S is fixed)
+    param_devs = [(code, param_device(s)) for code, s in enumerate(c.table) if isinstance(s, str)]
+    dev_of = np.full(len(c.table), -1, dtype=np.int64)
+    for code, d in param_devs:
+        if d is not None:
+            dev_of[code] = c.intern(d)
+    S = np.int64(len(c.table) + 1)
+    ng = np.asarray(c.node_graph, dtype=np.int64)
+    nid = np.asarray(c.node_id, dtype=np.int64)
+    ntype = np.asarray(c.node_type, dtype=np.int64)
+    lg = np.asarray(c.link_graph, dtype=np.int64)
+    lsrc = np.asarray(c.link_src, dtype=np.int64)
+    ldst = np.asarray(c.link_dst, dtype=np.int64)
+    lrel = np.asarray(c.link_rel, dtype=np.int64)
+
+    # graph-scoped keys: graph * S + string code
+    node_keys = ng * S + nid
+    src_keys = lg * S + lsrc
+    dst_keys = lg * S + ldst
+
+    def emit(mask, graphs, value_of, check):
+        for i in np.flatnonzero(mask).tolist():
+            _add_issue(report, c.files[graphs[i]], check, value_of(i))
+
+    # unknown node types
+    allowed_types = np.asarray([c.strings[t] for t in NODE_TYPES if t in c.strings], dtype=np.int64)
+    bad = ~np.isin(ntype, allowed_types)
+    emit(bad, ng, lambda i: c.table[ntype[i]], "unknown_type")
+
+    # duplicate ids: every occurrence after the first of a key
+    order = np.argsort(node_keys, kind="stable")
+    sorted_keys = node_keys[order]
+    dup = np.zeros(len(node_keys), dtype=bool)
+    if len(sorted_keys) > 1:
+        dup[order[1:][sorted_keys[1:] == sorted_keys[:-1]]] = True
+    emit(dup, ng, lambda i: c.table[nid[i]], "duplicate_id")
+
+    # dangling link endpoints
+    node_key_set = _sorted_unique(np, node_keys)
+    bad_src = ~np.isin(src_keys, node_key_set)
+    bad_dst = ~np.isin(dst_keys, node_key_set)
+    emit(bad_src | bad_dst, lg, lambda i: [c.table[lsrc[i]], c.table[ldst[i]]], "dangling_link")
+
+    # orphan W_/L_ parameters
+    param_code = c.strings.get("parameter", -1)
+    device_code = c.strings.get("device", -1)
+    wl_mask = (ntype == param_code) & (dev_of[nid] >= 0)
+    linked = np.isin(node_keys, _sorted_unique(np, np.concatenate([src_keys, dst_keys])))
+    graph_has_device = np.zeros(len(c.files), dtype=bool)
+    graph_has_device[ng[ntype == device_code]] = True
+    dev_keys = ng * S + np.where(wl_mask, dev_of[nid], 0)
+    missing_dev = graph_has_device[ng] & ~np.isin(dev_keys, node_key_set)
+    orphan = wl_mask & (~linked | missing_dev)
+    emit(orphan, ng, lambda i: c.table[nid[i]], "orphan_param")
+
+    # relation labels (links without a relation are structural and allowed)
+    allowed_rel = [c.strings[r] for r in ALLOWED_RELATIONS if r in c.strings]
+    if None in c.strings:
+        allowed_rel.append(c.strings[None])
+    bad_rel = ~np.isin(lrel, np.asarray(allowed_rel, dtype=np.int64))
+    emit(bad_rel, lg, lambda i: c.table[lrel[i]], "bad_relation")
+    return report
+
+
+def check_python(c: InternedCorpus) -> Dict[str, Dict[str, Any]]:
+    report: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    allowed_types = set(NODE_TYPES)
+    allowed_rel = set(ALLOWED_RELATIONS) | {None}
+    nodes_by_graph: Dict[int, set] = defaultdict(set)
+    linked: set = set()
+    has_device: set = set()
+    for g, s, t in zip(c.link_graph, c.link_src, c.link_dst):
+        linked.add((g, s))
+        linked.add((g, t))
+    for g, i, t in zip(c.node_graph, c.node_id, c.node_type):
+        if c.table[t] == "device":
+            has_device.add(g)
+    for g, i, t in zip(c.node_graph, c.node_id, c.node_type):
+        path = c.files[g]
+        if c.table[t] not in allowed_types:
+            _add_issue(report, path, "unknown_type", c.table[t])
+        if i in nodes_by_graph[g]:
+            _add_issue(report, path, "duplicate_id", c.table[i])
+        nodes_by_graph[g].add(i)
+    for g, i, t in zip(c.node_graph, c.node_id, c.node_type):
+        dev = param_device(c.table[i]) if c.table[t] == "parameter" and isinstance(c.table[i], str) else None
+        if dev is None:
+            continue
+        missing = g in has_device and c.strings.get(dev) not in nodes_by_graph[g]
+        if (g, i) not in linked or missing:
+            _add_issue(report, c.files[g], "orphan_param", c.table[i])
+    for g, s, t, r in zip(c.link_graph, c.link_src, c.link_dst, c.link_rel):
+        path = c.files[g]
+        if s not in nodes_by_graph[g] or t not in nodes_by_graph[g]:
+            _add_issue(report, path, "dangling_link", [c.table[s], c.table[t]])
+        if c.table[r] not in allowed_rel:
+            _add_issue(report, path, "bad_relation", c.table[r])
+    return report
+
+
+def validate_files(files: List[str], vectorized: bool = True) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+    """Validate graph files; returns (per-file issues, per-check totals)."""
+    corpus = InternedCorpus()
+    report: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    for path in files:
+        try:
+            corpus.add_graph(path, load_json(path))
+        except (OSError, ValueError) as e:
+            report[path]["unreadable"] = {"count": 1, "examples": [str(e)]}
+
+    np = load_numpy() if vectorized else None
+    issues = check_vectorized(corpus, np) if np is not None else check_python(corpus)
+    for path, checks in issues.items():
+        report[path].update(checks)
+
+    totals: Counter = Counter()
+    for checks in report.values():
+        for check, entry in checks.items():
+            totals[check] += entry["count"]
+    return dict(report), dict(totals)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Validate str/fun/comb graph JSON files across a corpus")
+    p.add_argument("paths", nargs="+", help="Graph JSON files or directories to scan recursively")
+    p.add_argument("--report", help="Write the full JSON report to this file")
+    p.add_argument("--no-numpy", action="store_true", help="Use the plain-Python checker")
+    args = p.parse_args(argv)
+
+    files = collect_graph_files(args.paths)
+    report, totals = validate_files(files, vectorized=not args.no_numpy)
+
+    for path in sorted(report):
+        summary = ", ".join(f"{k}={v['count']} (e.g. {v['examples'][0]!r})" for k, v in sorted(report[path].items()))
+        print(f"{path}: {summary}")
+    print(f"Checked {len(files)} graph files: " + (json.dumps(totals, sort_keys=True) if totals else "no issues"))
+
+    if args.report:
+        write_report = {"files_checked": len(files), "totals": totals, "files": report}
+        with open(args.report, "w") as f:
+            json.dump(write_report, f, indent=2)
+        print(f"Wrote report to {args.report}")
+    return 1 if totals else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Watch circuit directories and rebuild only the stages affected by a change.
+
+Every `--interval` seconds the watcher stats the inputs of each circuit
+directory under the given roots (`<root>/<id>/`): the netlist (as picked by
+the pipeline) and the functional graph (`fun_graph.json`). Pipeline outputs
+(str_graph.json, fun_updated.json, comb_graph.json, comb_graph_gnn.*) are
+never inputs, so the watcher's own writes do not retrigger it. A changed
+circuit is scheduled once its inputs have been quiet for `--debounce`
+seconds, which absorbs editors and copy tools writing in bursts.
+
+Stages form a small DAG and a change reruns only what depends on it:
+
+    netlist   -> str_graph ---\\
+                                +-> comb_graph -> gnn
+    fun_graph -> fun_updated --/
+
+Scheduled circuits go through a priority queue ordered by input size, so a
+freshly dropped small circuit is not stuck behind a large one, and run on a
+thread pool (never two jobs for the same circuit at once). Parsed
+str/fun_updated graphs stay cached in memory, so e.g. a new fun_graph.json
+only costs transform + combine + gnn. Outputs already newer than their inputs
+at startup are not rebuilt.
+
+Usage:
+  python scripts/watch_daemon.py netlists/diff_amps/
+  python scripts/watch_daemon.py netlists/diff_amps/ netlists/masala_chai_dirs/ --workers 4 --debounce 0.3
+  python scripts/watch_daemon.py netlists/diff_amps/ --once   # catch up on stale circuits and exit
+"""
+import argparse
+import heapq
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from graph_io import find_netlist_in_dir, load_json, load_netlist_parser, write_json
+from profiling import add_profiling_args, graph_counts, profiler_from_args
+
+import combine_graphs as cg
+import comb_graph_to_gnn as gnn
+import transform_fun_graph as tfg
+
+sg = load_netlist_parser()
+
+# stage -> (inputs/stages it reads, output file it writes)
+STAGES: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "str_graph": (("netlist",), "str_graph.json"),
+    "fun_updated": (("fun_graph",), "fun_updated.json"),
+    "comb_graph": (("str_graph", "fun_updated"), "comb_graph.json"),
+    "gnn": (("comb_graph",), "comb_graph_gnn_meta.json"),
+}
+STAGE_ORDER = ("str_graph", "fun_updated", "comb_graph", "gnn")
+
+
+def affected_stages(changed: Set[str]) -> List[str]:
+    """Stages downstream of the changed inputs, in execution order."""
+    dirty = set(changed)
+    out = []
+    for stage in STAGE_ORDER:
+        if dirty.intersection(STAGES[stage][0]):
+            dirty.add(stage)
+            out.append(stage)
+    return out
+
+
+def file_sig(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path) if path else None
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size) if st else None
+
+
+class CircuitState:
+    """Last seen inputs and warm parsed graphs of one circuit directory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inputs: Dict[str, Optional[str]] = {"netlist": None, "fun_graph": None}
+        self.sigs: Dict[str, Optional[Tuple[int, int]]] = {"netlist": None, "fun_graph": None}
+        self.graphs: Dict[str, Dict[str, Any]] = {}
+        self.changed: Set[str] = set()
+        self.last_change = 0.0
+        self.running = False
+
+    def size(self) -> int:
+        return sum(s[1] for s in self.sigs.values() if s)
+
+    def output(self, stage: str) -> str:
+        return os.path.join(self.path, STAGES[stage][1])
+
+    def graph(self, stage: str) -> Optional[Dict[str, Any]]:
+        """Cached graph of a stage, loaded from its output file on first use."""
+        if stage not in self.graphs and os.path.exists(self.output(stage)):
+            self.graphs[stage] = load_json(self.output(stage))
+        return self.graphs.get(stage)
+
+    def stale_at_startup(self) -> Set[str]:
+        """Changes left over from before the watcher started: outputs missing or older than what they are built from."""
+        stale = set()
+        for name, stage in (("netlist", "str_graph"), ("fun_graph", "fun_updated")):
+            sig = self.sigs[name]
+            out = file_sig(self.output(stage))
+            if sig is not None and (out is None or out[0] < sig[0]):
+                stale.add(name)
+        if self.sigs["fun_graph"] is not None and not stale and not self.outputs_current():
+            # str/fun graphs are current but comb_graph/gnn are not: rerun from combine
+            stale.add("str_graph")
+        return stale
+
+    def outputs_current(self) -> bool:
+        chain = [file_sig(self.output(s)) for s in ("str_graph", "fun_updated", "comb_graph", "gnn")]
+        if any(c is None for c in chain):
+            return False
+        str_sig, fun_sig, comb_sig, gnn_sig = chain
+        return max(str_sig[0], fun_sig[0]) <= comb_sig[0] <= gnn_sig[0]
+
+
+class Watcher:
+    def __init__(self, roots: List[str], args: argparse.Namespace):
+        self.roots = roots
+        self.args = args
+        self.circuits: Dict[str, CircuitState] = {}
+        self.queue: List[Tuple[int, int, str]] = []
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=args.workers)
+        self.inflight = 0
+        self.started = False
+
+    def circuit_dirs(self) -> List[str]:
+        dirs = []
+        for root in self.roots:
+            for name in sorted(os.listdir(root)):
+                d = os.path.join(root, name)
+                if os.path.isdir(d):
+                    dirs.append(d)
+        return dirs
+
+    def scan(self, now: float) -> None:
+        """Stat every circuit's inputs and record changes."""
+        for d in self.circuit_dirs():
+            state = self.circuits.get(d)
+            first_seen = state is None
+            if first_seen:
+                state = self.circuits[d] = CircuitState(d)
+            inputs = {"netlist": find_netlist_in_dir(d), "fun_graph": os.path.join(d, self.args.fun_graph_name)}
+            changed = set()
+            for name, path in inputs.items():
+                sig = file_sig(path)
+                if sig is None:
+                    path = None
+                if path != state.inputs[name] or sig != state.sigs[name]:
+                    state.inputs[name], state.sigs[name] = path, sig
+                    if sig is not None:
+                        changed.add(name)
+            if first_seen and not self.started:
+                # existing circuit at startup: only catch up on outdated outputs
+                changed = state.stale_at_startup() if changed else set()
+            if changed:
+                with self.lock:
+                    state.changed |= changed
+                    state.last_change = now
+
+    def schedule(self, now: float) -> None:
+        """Queue circuits whose changes have settled for the debounce period."""
+        with self.lock:
+            for d, state in self.circuits.items():
+                if state.changed and not state.running and now - state.last_change >= self.args.debounce:
+                    if not any(q[2] == d for q in self.queue):
+                        heapq.heappush(self.queue, (state.size(), self.seq, d))
+                        self.seq += 1
+            while self.queue and self.inflight < self.args.workers:
+                _, _, d = heapq.heappop(self.queue)
+                state = self.circuits[d]
+                changed, state.changed = state.changed, set()
+                state.running = True
+                self.inflight += 1
+                self.pool.submit(self.run_job, state, changed)
+
+    def run_job(self, state: CircuitState, changed: Set[str]) -> None:
+        t0 = time.perf_counter()
+        try:
+            done = self.rebuild(state, changed)
+            if done:
+                ms = (time.perf_counter() - t0) * 1000
+                print(f"[{state.path}] rebuilt {', '.join(done)} in {ms:.0f} ms", flush=True)
+        except Exception as e:  # keep watching; the next change to this circuit retries
+            state.graphs.clear()
+            print(f"[{state.path}] FAILED: {e}", file=sys.stderr, flush=True)
+        finally:
+            with self.lock:
+                state.running = False
+                self.inflight -= 1
+
+    def rebuild(self, state: CircuitState, changed: Set[str]) -> List[str]:
+        profiler = profiler_from_args(self.args, circuit=state.path)
+        done = []
+        for stage in affected_stages(changed):
+            if stage == "str_graph":
+                if state.inputs["netlist"] is None:
+                    continue
+                with open(state.inputs["netlist"], "r") as f:
+                    text = f.read()
+                with profiler.stage("parse_netlist") as rec:
+                    graph = sg.netlist_to_graph_json(text)
+                    rec.update(graph_counts(graph))
+            elif stage == "fun_updated":
+                if state.inputs["fun_graph"] is None:
+                    continue
+                with profiler.stage("transform_fun_graph") as rec:
+                    graph = tfg.transform_fun_graph(load_json(state.inputs["fun_graph"]))
+                    rec.update(graph_counts(graph))
+            elif stage == "comb_graph":
+                str_graph, fun_updated = state.graph("str_graph"), state.graph("fun_updated")
+                if str_graph is None or fun_updated is None:
+                    continue
+                with profiler.stage("combine_graphs") as rec:
+                    graph = cg.build_combined_graph(str_graph, fun_updated)
+                    rec.update(graph_counts(graph))
+            else:
+                comb = state.graph("comb_graph")
+                if comb is None:
+                    continue
+                gnn.write_gnn_outputs(comb, state.path, profiler)
+                done.append(stage)
+                continue
+            state.graphs[stage] = graph
+            write_json(graph, state.output(stage))
+            done.append(stage)
+        return done
+
+    def idle(self) -> bool:
+        with self.lock:
+            return not self.queue and self.inflight == 0 and not any(s.changed for s in self.circuits.values())
+
+    def run(self, once: bool = False) -> None:
+        try:
+            while True:
+                now = time.monotonic()
+                self.scan(now)
+                self.started = True
+                self.schedule(now)
+                if once and self.idle():
+                    break
+                time.sleep(self.args.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.pool.shutdown(wait=True)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Watch circuit directories and rebuild affected pipeline stages")
+    p.add_argument("roots", nargs="+", help="Directories whose subdirectories are circuits (e.g. netlists/diff_amps/)")
+    p.add_argument("--interval", type=float, default=0.2, help="Polling interval in seconds (default: 0.2)")
+    p.add_argument("--debounce", type=float, default=0.3, help="Quiet time before a changed circuit is rebuilt (default: 0.3)")
+    p.add_argument("--workers", type=int, default=4, help="Concurrent rebuild jobs (default: 4)")
+    p.add_argument("--fun-graph-name", default="fun_graph.json", help="Functional graph filename inside each directory")
+    p.add_argument("--once", action="store_true", help="Rebuild outdated circuits, wait for them and exit")
+    add_profiling_args(p)
+    args = p.parse_args(argv)
+
+    for root in args.roots:
+        if not os.path.isdir(root):
+            raise SystemExit(f"Not a directory: {root}")
+    print(f"Watching {', '.join(args.roots)} (Ctrl-C to stop)", flush=True)
+    Watcher(args.roots, args).run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the pipeline scripts import each other as top-level modules
+for d in (os.path.join(REPO_ROOT, "scripts"), REPO_ROOT):
+    if d not in sys.path:
+        sys.path.insert(0, d)
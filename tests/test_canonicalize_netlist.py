@@ -0,0 +1,34 @@
+import json
+
+from canonicalize_netlist import canonicalize
+from graph_io import load_netlist_parser
+
+sg = load_netlist_parser()
+
+SPECTRE_NETLIST = """\
+// amplifier with a subckt instance
+I0 (VIN1 VIN2 net3 VOUT1) amp
+R1 (VDD net3) resistor r=10k
+V0 (VDD 0) vsource dc=1.8
+M2 (VOUT1 net14 VDD VDD) pmos4
+"""
+
+
+def canon(graph):
+    return (sorted(json.dumps(n, sort_keys=True) for n in graph["nodes"]),
+            sorted(json.dumps(l, sort_keys=True) for l in graph["links"]))
+
+
+def test_paren_instances_keep_their_model():
+    text, reverse_map = canonicalize(SPECTRE_NETLIST, rename_nets=True)
+    lines = text.splitlines()
+    assert lines[0] == "I0 (VIN1 VIN2 n1 VOUT1) amp"
+    assert lines[1] == "R1 (VDD n1) resistor"
+    assert reverse_map == {"n1": "net3", "n2": "net14"}
+
+
+def test_canonical_netlist_parses_to_the_same_graph():
+    text, _ = canonicalize(SPECTRE_NETLIST)
+    assert canon(sg.netlist_to_graph_json(text)) == canon(sg.netlist_to_graph_json(SPECTRE_NETLIST))
+    devices = {n["id"]: n["device_type"] for n in sg.netlist_to_graph_json(text)["nodes"] if n["type"] == "device"}
+    assert devices["dev:I0"] == "amp"
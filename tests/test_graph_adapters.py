@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from comb_graph_to_gnn import csr_arrays
+from graph_adapters import GNNArrays
+
+NPZ = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   "netlists", "diff_amps", "84", "comb_graph_gnn.npz")
+
+
+def edge_counts(g):
+    import networkx as nx
+    G = g.to_networkx(node_attrs=False)
+    # networkx stores each undirected edge once; edge_index/CSR hold both directions, a self-loop once
+    return g.to_csr().nnz, g.num_edges, 2 * G.number_of_edges() - nx.number_of_selfloops(G)
+
+
+def test_adapters_agree_on_edge_counts_with_self_loops():
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("scipy")
+    pytest.importorskip("networkx")
+    adjacency = np.array([[1, 1, 0], [1, 0, 1], [0, 1, 1]], dtype=np.uint8)
+    edge_index, indptr = csr_arrays(adjacency, np)
+    g = GNNArrays(np.array(["a", "b", "c"], dtype=object), np.zeros((3, 6), dtype=np.float32),
+                  edge_index, indptr)
+    assert edge_counts(g) == (6, 6, 6)
+    assert g.to_networkx().number_of_edges() == 4
+
+
+def test_adapters_agree_on_edge_counts_for_stored_graph():
+    pytest.importorskip("scipy")
+    pytest.importorskip("networkx")
+    g = GNNArrays.load(NPZ)
+    nnz, edges, directed_nx = edge_counts(g)
+    assert nnz == edges == directed_nx
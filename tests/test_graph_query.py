@@ -0,0 +1,57 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+from graph_io import load_json, load_netlist_parser
+from graph_query import GraphIndex, main, run_query
+
+STR_GRAPH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "netlists", "diff_amps", "84", "str_graph.json")
+
+
+@pytest.fixture(scope="module")
+def index():
+    return GraphIndex(load_json(STR_GRAPH))
+
+
+def test_khop_accepts_bare_names(index):
+    assert index.k_hop("M2", 1) == index.k_hop("dev:M2", 1)
+    assert index.k_hop("M2", 1) == {"dev:M2", "term:M2:D", "term:M2:G", "term:M2:S"}
+    assert index.k_hop("net08", 1) == index.k_hop("net:net08", 1)
+    assert "net:net08" in index.k_hop("net08", 1)
+    assert index.k_hop("nope", 2) == set()
+
+
+def test_run_query_rejects_bad_queries(index):
+    with pytest.raises(ValueError):
+        run_query(index, "bogus", ["x"])
+    with pytest.raises(ValueError):
+        run_query(index, "shared", ["M2"])
+    with pytest.raises(ValueError):
+        run_query(index, "net", [])
+
+
+def test_query_batch_reports_errors_per_line(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("net net08\nbogus x\nshared M2\nkhop M2 1\n"))
+    main(["--graph", STR_GRAPH, "--queries", "-"])
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [("result" in r, "error" in r) for r in records] == [(True, False), (False, True),
+                                                                  (False, True), (True, False)]
+    assert records[3]["result"] == ["dev:M2", "term:M2:D", "term:M2:G", "term:M2:S"]
+
+
+def test_drivers_counts_mos_drain_source_and_source_outputs():
+    graph = load_netlist_parser().netlist_to_graph_json(
+        "M0 out in s 0 nmos4\nM1 vdd g out 0 nmos4\nM2 x out 0 0 nmos4\nR1 out vdd 1k\n"
+        "C1 out 0 1p\nV1 out 0 1\nX1 a out b amp\n")
+    assert GraphIndex(graph).drivers("out") == [("dev:M0", "D"), ("dev:M1", "S"), ("dev:V1", "p0")]
+
+
+def test_query_batch_leaves_stdin_open(monkeypatch, capsys):
+    stdin = io.StringIO("net net08\n")
+    monkeypatch.setattr(sys, "stdin", stdin)
+    main(["--graph", STR_GRAPH, "--queries", "-"])
+    assert not stdin.closed
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+import combine_graphs as cg
+import comb_graph_to_gnn as gnn
+from graph_io import load_json, load_netlist_parser
+from incremental_update import IncrementalGraphs
+
+sg = load_netlist_parser()
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NETLIST = os.path.join(REPO_ROOT, "netlists", "masala_chai", "netlist2.cir")
+FUN_UPDATED = os.path.join(REPO_ROOT, "netlists", "diff_amps", "84", "fun_updated.json")
+
+
+def canon(graph):
+    return (sorted(json.dumps(n, sort_keys=True) for n in graph["nodes"]),
+            sorted(json.dumps(l, sort_keys=True) for l in graph["links"]))
+
+
+def full_build(netlist_text, fun_updated):
+    str_graph = sg.netlist_to_graph_json(netlist_text)
+    return str_graph, cg.build_combined_graph(str_graph, fun_updated)
+
+
+def gnn_arrays(comb, np):
+    nodes = comb["nodes"]
+    features, _, _ = gnn.build_feature_matrix(nodes, gnn.detect_performance_meanings(nodes),
+                                              gnn.detect_substructure_types(nodes))
+    return {"nodes": np.array([n["id"] for n in nodes], dtype=object),
+            "features": np.asarray(features, dtype=np.float32),
+            "adjacency": np.asarray(gnn.build_adjacency(nodes, comb["links"]), dtype=np.uint8)}
+
+
+def dense_by_id(arrays):
+    ids = arrays["nodes"].tolist()
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    return [ids[i] for i in order], arrays["features"][order], arrays["adjacency"][order][:, order]
+
+
+@pytest.mark.parametrize("old, new", [
+    ("M5 (net8 VCONT1 IB1 VSS) nmos4", "M5 (net8 VCONT1 IB2 VSS) nmos4"),
+    ("R1 (VDD VOUT1) resistor", "R1 (VDD VOUT3) resistor"),
+    ("R1 (VDD VOUT1) resistor", "R1 (VDD VOUT2) resistor"),
+    ("R1 (VDD VOUT1) resistor", "M1 (VOUT1 VIN1 net9 VSS) nmos4"),
+])
+def test_update_matches_full_rebuild_with_duplicate_names(old, new):
+    np = pytest.importorskip("numpy")
+    with open(NETLIST) as f:
+        text = f.read()
+    assert text.count("\nR1 ") == 2 and old in text
+    edited = text.replace(old, new)
+    fun_updated = load_json(FUN_UPDATED)
+
+    str_graph, comb = full_build(text, fun_updated)
+    meta = {"performance_meanings": gnn.detect_performance_meanings(comb["nodes"]),
+            "substructure_types": gnn.detect_substructure_types(comb["nodes"])}
+    graphs = IncrementalGraphs(str_graph, comb, gnn_arrays(comb, np), meta)
+    summary = graphs.update(edited)
+    assert "R1" not in summary["changed"] or old.startswith("R1")
+
+    want_str, want_comb = full_build(edited, fun_updated)
+    assert canon(graphs.str_graph) == canon(want_str)
+    assert canon(graphs.comb_graph) == canon(want_comb)
+    got_ids, got_x, got_adj = dense_by_id(graphs.gnn)
+    want_ids, want_x, want_adj = dense_by_id(gnn_arrays(want_comb, np))
+    assert got_ids == want_ids
+    assert np.array_equal(got_x, want_x)
+    assert np.array_equal(got_adj, want_adj)
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+import ingest_corpus as ic
+
+HEADER = re.compile(ic.DEFAULT_HEADER_RE, re.M)
+
+CORPUS = b"""\
+M9 (VOUT1 VIN1 net1 VSS) nmos4
+* AnalogGenie 84
+M2 (VOUT2 VIN2 net08 VSS) nmos4
+R1 (VDD VOUT2) resistor
+* AnalogGenie 85
+M0 (VOUT1 VIN1 net08 VSS) nmos4
+"""
+
+
+def test_split_circuits_keeps_text_before_first_header(capsys):
+    ranges = ic.split_circuits(CORPUS, HEADER, "corpus")
+    assert [cid for cid, _, _ in ranges] == ["corpus", "84", "85"]
+    assert CORPUS[ranges[0][1]:ranges[0][2]].startswith(b"M9 ")
+    assert "before the first circuit header" in capsys.readouterr().err
+
+
+def test_split_circuits_ignores_comment_only_preamble():
+    data = b"* exported corpus\n\n// generated\n" + CORPUS[CORPUS.index(b"* AnalogGenie 84"):]
+    assert [cid for cid, _, _ in ic.split_circuits(data, HEADER, "corpus")] == ["84", "85"]
+
+
+def test_ingest_round_trip_with_preamble(tmp_path):
+    pytest.importorskip("numpy")
+    src = tmp_path / "corpus.txt"
+    src.write_bytes(CORPUS)
+    ic.ingest([str(src)], str(tmp_path / "packed.npz"), workers=1)
+    corpus = ic.PackedCorpus(str(tmp_path / "packed.npz"))
+    assert corpus.circuit_ids.tolist() == ["corpus", "84", "85"]
+    want = ic.sg.netlist_to_graph_json(CORPUS[:CORPUS.index(b"* AnalogGenie")].decode())
+    assert corpus.graph(0) == want
+
+
+def test_pack_graphs_rejects_unknown_node_types(monkeypatch):
+    pytest.importorskip("numpy")
+    graph = {"nodes": [{"id": "dev:M0", "type": "device", "device_type": "nmos4"},
+                       {"id": "port:A", "type": "port"}],
+             "links": [{"source": "dev:M0", "target": "port:A"}]}
+    monkeypatch.setattr(ic.sg, "netlist_to_graph_json", lambda text: graph)
+    with pytest.raises(ValueError, match="unknown type 'port'"):
+        ic.pack_graphs([("c0", "")])
+
+
+def test_ingest_skips_and_reports_unparsable_circuits(tmp_path, capfd):
+    pytest.importorskip("numpy")
+    src = tmp_path / "corpus.txt"
+    bad = b"* AnalogGenie 99\nM1 (a b) nmos4\n"
+    src.write_bytes(CORPUS[CORPUS.index(b"* AnalogGenie 84"):] + bad)
+    ic.ingest([str(src)], str(tmp_path / "packed.npz"), workers=1)
+    assert "FAILED 99" in capfd.readouterr().err  # printed by the worker process
+    corpus = ic.PackedCorpus(str(tmp_path / "packed.npz"))
+    assert corpus.circuit_ids.tolist() == ["84", "85"]
+    assert corpus.arrays["failed_ids"].tolist() == ["99"]
+    assert corpus.graph(1)["nodes"][0]["id"] == "dev:M0"
@@ -0,0 +1,58 @@
+from graph_io import load_netlist_parser
+
+sg = load_netlist_parser()
+
+SPECTRE_NETLIST = """\
+// Generated for: spectre
+simulator lang=spectre
+global 0
+include "/pdk/models/x.scs" section=tt
+parameters wn=2u
+M2 (VOUT1 net14 VDD VDD) pmos4 w=2*wn
+R1 (VOUT1 net14) resistor r=10k
+V0 (VDD 0) vsource dc=1.8
+finalTimeOP info what=oppoint where=rawfile
+modelParameter info what=models where=rawfile
+simulatorOptions options reltol=1e-3 temp=27
+tran tran stop=1u
+save M2:d
+"""
+
+
+def device_ids(graph):
+    return sorted(n["id"] for n in graph["nodes"] if n["type"] == "device")
+
+
+def test_spectre_control_lines_are_not_devices():
+    graph = sg.netlist_to_graph_json(SPECTRE_NETLIST)
+    assert device_ids(graph) == ["dev:M2", "dev:R1", "dev:V0"]
+
+
+def test_spectre_control_lines_without_lang_marker():
+    # no `simulator lang=spectre` and no parenthesized instances: parsed as SPICE
+    text = "\n".join(l for l in SPECTRE_NETLIST.splitlines() if "(" not in l and "simulator" not in l)
+    assert sg.is_spice_dialect(text)
+    assert device_ids(sg.netlist_to_graph_json(text)) == []
+    for line in ('include "/pdk/x.scs" section=tt', "finalTimeOP info what=oppoint where=rawfile"):
+        assert sg.parse_spice_element(line) is None
+
+
+def test_dialect_detection_and_override():
+    spice = "M0 VOUT1 VIN1 IB1 VSS nmos4 W=1u L=1u\nR1 VOUT1 VDD 10k\n"
+    assert sg.is_spice_dialect(spice)
+    assert device_ids(sg.netlist_to_graph_json(spice)) == ["dev:M0", "dev:R1"]
+    assert device_ids(sg.netlist_to_graph_json(spice, dialect="spectre")) == []
+
+    mixed = "M2 (VOUT1 net14 VDD VDD) pmos4\nR1 VOUT1 VDD 10k\n"
+    assert not sg.is_spice_dialect(mixed)
+    assert device_ids(sg.netlist_to_graph_json(mixed)) == ["dev:M2"]
+    assert device_ids(sg.netlist_to_graph_json(mixed, dialect="spice")) == ["dev:M2", "dev:R1"]
+
+
+def test_strip_inline_comment_keeps_expressions():
+    assert sg.strip_inline_comment(".param WTAIL={2*WN}") == ".param WTAIL={2*WN}"
+    assert sg.strip_inline_comment(".param WTAIL='WN*2' $ tail") == ".param WTAIL='WN*2'"
+    assert sg.strip_inline_comment("R1 a b {R0;1} ; load") == "R1 a b {R0;1}"
+    assert sg.strip_inline_comment("M11 n5 0 0 0 NMOS W=1u L=1u * gate=0") == "M11 n5 0 0 0 NMOS W=1u L=1u"
+    assert sg.strip_inline_comment("M2 (a b c d) pmos4 // load") == "M2 (a b c d) pmos4"
+    assert sg.strip_inline_comment("* full comment") == ""
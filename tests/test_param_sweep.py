@@ -0,0 +1,38 @@
+import pytest
+
+from param_sweep import evaluate_variants, parse_device_sizes, parse_params
+
+NETLIST = """\
+* continuation lines and expressions with '*'
+.param WN=1u
++ LN=0.5u     $ channel length
+.param WTAIL={2*WN} WP='WN*2'
+M0 VOUT1 VIN1 net08 VSS nmos4
++ W={WN} L={LN}
+M1 net08 VB1 VSS VSS nmos4 W={WTAIL}
++ L={LN}
+M3 VOUT1 VB2 VDD VDD pmos4 W='WP' L=LN * load
+R0 VOUT1 VDD
++ 10k
+"""
+
+
+def test_parse_params_joins_continuations_and_keeps_star_expressions():
+    params = parse_params(NETLIST)
+    assert params == {"WN": "1u", "LN": "0.5u", "WTAIL": "{2*WN}", "WP": "'WN*2'"}
+
+
+def test_parse_device_sizes_joins_continuations():
+    sizes = parse_device_sizes(NETLIST)
+    assert sizes["M0"] == {"W": "{WN}", "L": "{LN}"}
+    assert sizes["M1"] == {"W": "{WTAIL}", "L": "{LN}"}
+    assert sizes["M3"] == {"W": "'WP'", "L": "LN"}
+    assert sizes["R0"] == {"value": "10k"}
+
+
+def test_evaluate_variants_with_star_expressions():
+    np = pytest.importorskip("numpy")
+    env = evaluate_variants(parse_params(NETLIST), ["WN"], np.array([[1e-6], [3e-6]]), np)
+    assert np.allclose(env["WTAIL"], [2e-6, 6e-6])
+    assert np.allclose(env["WP"], [2e-6, 6e-6])
+    assert np.allclose(env["LN"], [0.5e-6, 0.5e-6])
@@ -0,0 +1,45 @@
+import os
+import shutil
+
+import pytest
+
+import generate_fun_graph_prompt
+import generate_prune_prompt
+import similarity_index
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NETLIST = os.path.join(REPO_ROOT, "netlists", "diff_amps", "84", "84_gpt.sp")
+
+
+def test_prune_prompt_rename_nets_implies_compact(tmp_path, capsys):
+    netlist = shutil.copy(NETLIST, tmp_path)
+    generate_prune_prompt.main(["--netlist", netlist, "--rename-nets"])
+    out, err = capsys.readouterr()
+    assert "net08" not in out and " n1 " in out
+    assert "tokens" not in out and "tokens" in err
+    assert (tmp_path / "net_map.json").exists()
+
+
+def test_fun_graph_prompt_reports_savings_on_stderr(tmp_path, capsys):
+    netlist = shutil.copy(NETLIST, tmp_path)
+    out_path = tmp_path / "prompt.txt"
+    generate_fun_graph_prompt.main(["--netlist", netlist, "--rename-nets", "--out", str(out_path)])
+    out, err = capsys.readouterr()
+    assert "tokens" not in out and "tokens" in err
+    assert "net08" not in out_path.read_text()
+
+
+def test_fun_graph_prompt_compacts_examples(tmp_path, capsys):
+    pytest.importorskip("numpy")
+    idx = str(tmp_path / "idx.npz")
+    similarity_index.main(["--index", idx, "--add", os.path.join(REPO_ROOT, "netlists", "diff_amps")])
+    capsys.readouterr()
+    netlist = shutil.copy(NETLIST, tmp_path)
+    out_path = tmp_path / "prompt.txt"
+    generate_fun_graph_prompt.main(["--netlist", netlist, "--examples-index", idx, "--num-examples", "1",
+                                    "--compact", "--out", str(out_path)])
+    out, err = capsys.readouterr()
+    assert "Using example" in err and "Using example" not in out
+    prompt = out_path.read_text()
+    example = prompt.split("Example 1 netlist:\n```\n", 1)[1].split("```", 1)[0]
+    assert example.strip() and not any(l.startswith(("*", ".param")) for l in example.splitlines())
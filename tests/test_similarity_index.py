@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+import similarity_index
+
+DIFF_AMPS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "netlists", "diff_amps")
+
+
+def test_index_path_without_suffix_is_reused(tmp_path, capsys):
+    pytest.importorskip("numpy")
+    idx = str(tmp_path / "idx")
+    similarity_index.main(["--index", idx, "--add", os.path.join(DIFF_AMPS, "84")])
+    similarity_index.main(["--index", idx, "--add", os.path.join(DIFF_AMPS, "86")])
+    assert os.listdir(tmp_path) == ["idx.npz"]
+    assert len(similarity_index.SimilarityIndex.load(idx)) == 2
+    assert f"index {idx}.npz holds 2" in capsys.readouterr().out
+
+
+def test_similar_fun_graphs_excludes_the_query_circuit(tmp_path):
+    pytest.importorskip("numpy")
+    idx = str(tmp_path / "idx.npz")
+    similarity_index.main(["--index", idx, "--add", DIFF_AMPS])
+    _, graph = similarity_index.query_graph(os.path.join(DIFF_AMPS, "84"))
+    rel = os.path.relpath(os.path.join(DIFF_AMPS, "84"))
+    hits = similarity_index.similar_fun_graphs(idx, graph, 2, exclude=rel)
+    assert len(hits) == 2
+    assert all(os.path.realpath(cid) != os.path.realpath(rel) for cid, _ in hits)